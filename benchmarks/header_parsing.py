@@ -0,0 +1,110 @@
+"""Benchmark: parsing weather file headers.
+
+Writes a synthetic corpus of weather files (half in each metadata format) and
+parses every file in it, comparing the former text-mode, line-by-line parse
+(`wxfs.indexer.file_parsing.get_wx_file_info`) with the bounded header scanner
+(`wxfs.indexer.headers.scan_header`). The corpus is written to a temporary
+directory unless one is given, in which case it is reused on later runs.
+
+Usage:
+
+    python -m benchmarks.header_parsing [-n FILES] [-r REPEAT] [-d DIRECTORY]
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import timeit
+
+from wxfs.indexer.file_parsing import get_wx_file_info
+from wxfs.indexer.headers import scan_header
+
+
+# Data lines per file. Real files have a line per hour of the year; the
+# parsers never get that far.
+body = "2050,1,1,1,60,?9?9?9?9E0?9?9?9?9?9?9?9?9?9?9?9?9?9?9?9*9*9?9?9?9,-5.0\n" * 100
+
+
+def make_corpus(directory, n):
+    """Write `n` weather files to `directory`, unless already there, and return
+    their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(n):
+        city, code = f"City{i}", f"{100000 + i}"
+        lat, lon = 49.0 + i % 1000 / 100, -123.0 - i // 1000 / 100
+        location = f"LOCATION,{city},BC,CAN,CWEC2016,{code},{lat},{lon},-8.0,10.0"
+        if i % 2:
+            name = f"2050s_CAN_BC_{city}.{code}_CWEC2016.epw"
+            header = (
+                f"{location} | Morphed:TAS,RHS,DWPT,PS | File Version: 2.1 "
+                f"| Creation Date: 2020-06-23\n"
+            )
+        else:
+            name = f"MORPHED_SSP245_2050s_CAN_BC_{city}.{code}_CWEC2016.epw"
+            header = (
+                f"{location}\n"
+                f"DESIGN CONDITIONS,0\n"
+                f"TYPICAL/EXTREME PERIODS,0\n"
+                f"GROUND TEMPERATURES,0\n"
+                f"HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0\n"
+                f"COMMENTS 1, Future-shifted CWEC2020 EPW file for the 2050s "
+                f"using projections from the SSP245 scenario.\n"
+                f"COMMENTS 2, Future-shifted variables:TAS,RHS,DWPT,PS, "
+                f"File Version: 3.0, Creation Date: 2020-06-23\n"
+                f"DATA PERIODS,1,1,Data,Sunday, 1/ 1,12/31\n"
+            )
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            with open(path, "w") as file:
+                file.write(header + body)
+        paths.append(path)
+    return paths
+
+
+def line_by_line(filepath):
+    with open(filepath, "r") as file:
+        return get_wx_file_info(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=100000, help="Number of files")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Repeats")
+    parser.add_argument("-d", "--directory", help="Corpus directory")
+    args = parser.parse_args()
+    # The parsers log at info level about defaults; don't time the logging.
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as temporary:
+        paths = make_corpus(args.directory or temporary, args.n)
+        for path in paths[:100]:
+            assert scan_header(path) == line_by_line(path)
+
+        timings = {
+            name: min(
+                timeit.repeat(
+                    lambda: [parse(path) for path in paths],
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            for name, parse in (
+                ("line by line", line_by_line),
+                ("bounded header scan", scan_header),
+            )
+        }
+
+    baseline = timings["line by line"]
+    print(f"Parsing {args.n} files (best of {args.repeat}):")
+    for name, seconds in timings.items():
+        print(
+            f"  {name:<20} {seconds:8.2f} s"
+            f"  {args.n / seconds:9.0f} files/s"
+            f"  x{baseline / seconds:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark: reading the hourly data of weather files.
+
+Writes synthetic weather files with a year of hourly data and reads the data of
+every file, comparing parsing the text (`wxfs.epw.read_data`) with loading
+sidecars (`wxfs.columnar.load`), which are written before timing. Loading maps
+the sidecars without copying; to include touching the data, the benchmark sums
+the dry-bulb temperature of each file.
+
+Usage:
+
+    python -m benchmarks.hourly_data [-n FILES] [-r REPEAT]
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+from wxfs import columnar, epw
+
+
+header = (
+    "LOCATION,Anyville,BC,CAN,CWEC2016,999999,50.0,-124.5,-8.0,10.0\n"
+    "DESIGN CONDITIONS,0\n"
+    "TYPICAL/EXTREME PERIODS,0\n"
+    "GROUND TEMPERATURES,0\n"
+    "HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0\n"
+    "COMMENTS 1,Synthetic data\n"
+    "COMMENTS 2,Synthetic data\n"
+    "DATA PERIODS,1,1,Data,Sunday, 1/ 1,12/31\n"
+)
+
+
+def make_data():
+    """Return a year of hourly data lines."""
+    days_in_month = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+    lines = []
+    for month, days in enumerate(days_in_month, 1):
+        for day in range(1, days + 1):
+            for hour in range(1, 25):
+                t = (month * 7 + hour) % 40 - 15
+                lines.append(
+                    f"2050,{month},{day},{hour},60,"
+                    f"?9?9?9?9E0?9?9?9?9?9?9?9?9?9?9?9?9?9?9?9*9*9?9?9?9,"
+                    f"{t:.1f},{t - 5:.1f},70,100000,0,0,300,{hour * 10},0,0,0,0,"
+                    f"0,0,{hour * 15},{hour / 4:.1f},5,5,20.0,77777,9,999999999,"
+                    f"10,0.1,0,88,0.2,0.0,0.0\n"
+                )
+    return "".join(lines)
+
+
+def make_files(directory, n):
+    """Write `n` weather files to `directory` and return their paths."""
+    data = make_data()
+    paths = []
+    for i in range(n):
+        path = os.path.join(directory, f"{i}.epw")
+        with open(path, "w") as file:
+            file.write(header + data)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=100, help="Number of files")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Repeats")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary:
+        paths = make_files(temporary, args.n)
+        sidecars = os.path.join(temporary, "sidecars")
+        for path in paths:
+            columnar.write(path, sidecars)
+
+        timings = {
+            name: min(
+                timeit.repeat(
+                    lambda: [
+                        float(read(path)["dryBulbTemperature"].sum()) for path in paths
+                    ],
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            for name, read in (
+                ("parse text", epw.read_data),
+                ("load sidecar", lambda path: columnar.load(path, sidecars)),
+            )
+        }
+
+    baseline = timings["parse text"]
+    print(f"Reading {args.n} files (best of {args.repeat}):")
+    for name, seconds in timings.items():
+        print(
+            f"  {name:<14} {seconds:8.3f} s"
+            f"  {args.n / seconds:9.0f} files/s"
+            f"  x{baseline / seconds:.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Micro-benchmark: serialization of the file listing.
+
+Compares building file representations the way the listing used to, from ORM
+objects with `url_for` called for every URI, against the compiled serializer
+(`wxfs.api.files.row_serializer`), which works from rows of column values with
+URIs resolved once. Only serialization is timed; no database is involved.
+
+Usage:
+
+    python -m benchmarks.serialization [-n FILES] [-r REPEAT]
+"""
+
+import argparse
+import datetime
+import timeit
+
+from flask import url_for
+
+from wxfs import create_app
+from wxfs.api.files import base_columns, subtype_columns, row_serializer
+from wxfs.database import WxFile, SummaryFile
+
+
+def weather_values(id):
+    return dict(
+        id=id,
+        fileType="weather",
+        filepath=f"/storage/wx-files/City_{id}_TMY_2050s.epw",
+        scenario="SSP5-8.5",
+        version="CMIP6",
+        location_id=id // 10,
+        creationDate=datetime.datetime(2021, 1, 1),
+        dataSource="CWEC 2016",
+        designDataType="TMY",
+        timePeriodStart=datetime.datetime(2041, 1, 1),
+        timePeriodEnd=datetime.datetime(2070, 12, 31),
+        ensembleStatistic="median",
+        variables="all thermodynamic",
+        anomaly="daily",
+        smoothing=21,
+    )
+
+
+def summary_values(id):
+    return dict(
+        id=id,
+        fileType="summary",
+        filepath=f"/storage/wx-files/City_{id}_summary.xlsx",
+        scenario="multiple",
+        version="CMIP6",
+        location_id=id // 10,
+    )
+
+
+def make_files(n):
+    """Return `n` files (mostly weather files, as in the catalog) as ORM
+    objects and as rows."""
+    values = [
+        summary_values(id) if id % 10 == 0 else weather_values(id) for id in range(n)
+    ]
+    objects = [
+        SummaryFile(**v) if v["fileType"] == "summary" else WxFile(**v) for v in values
+    ]
+    rows = [
+        tuple(v.get(name) for name in base_columns + subtype_columns) for v in values
+    ]
+    return objects, rows
+
+
+def orm_rep(file):
+    """Representation of a file as formerly built, per item."""
+    rep_common = {
+        "id": file.id,
+        "selfUri": url_for(".wxfs_api_files_get", id=file.id),
+        "fileType": file.fileType,
+        "filepath": file.filepath,
+        "contentUri": url_for(".wxfs_api_files_getContent", id=file.id),
+    }
+    if file.fileType == "weather":
+        return {
+            **rep_common,
+            "creationDate": file.creationDate,
+            "dataSource": file.dataSource,
+            "designDataType": file.designDataType,
+            "scenario": file.scenario,
+            "timePeriod": {
+                "start": file.timePeriodStart,
+                "end": file.timePeriodEnd,
+            },
+            "ensembleStatistic": file.ensembleStatistic,
+            "variables": file.variables,
+            "anomaly": file.anomaly,
+            "smoothing": file.smoothing,
+            "version": file.version,
+        }
+    return {
+        **rep_common,
+        "scenario": file.scenario,
+        "version": file.version,
+        "ensembleStatistic": "multiple",
+        "timePeriod": "all",
+        "variables": "all thermodynamic",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", type=int, default=10000, help="Number of files")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Repeats")
+    args = parser.parse_args()
+
+    connexion_app, flask_app, _ = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    # The API's routes are registered when the app starts up.
+    with connexion_app.test_client():
+        pass
+    objects, rows = make_files(args.n)
+
+    with flask_app.test_request_context("/files"):
+
+        def orm():
+            return [orm_rep(file) for file in objects]
+
+        def compiled():
+            serialize = row_serializer()
+            return [serialize(row) for row in rows]
+
+        assert orm() == compiled()
+
+        timings = {
+            name: min(timeit.repeat(f, number=1, repeat=args.repeat))
+            for name, f in (("per-item (ORM, url_for)", orm), ("compiled", compiled))
+        }
+
+    baseline = timings["per-item (ORM, url_for)"]
+    print(f"Serializing {args.n} files (best of {args.repeat}):")
+    for name, seconds in timings.items():
+        print(
+            f"  {name:<24} {seconds * 1000:8.1f} ms"
+            f"  {seconds / args.n * 1e6:6.2f} us/file"
+            f"  x{baseline / seconds:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import contextlib
+import datetime
+
+import pytest
+import testing.postgresql
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from wxfs import create_app, get_app_db
+from wxfs.database import Base, Location, WxFile, SummaryFile
+
+
+@pytest.fixture()
+def db_uri():
+    with testing.postgresql.Postgresql() as pg:
+        yield pg.url()
+
+
+@pytest.fixture()
+def app_config():
+    """Configuration overrides for the app. Override this fixture in a test
+    module to test under a different configuration."""
+    return {}
+
+
+@pytest.fixture()
+def app(db_uri, app_config):
+    connexion_app, flask_app, app_db = create_app(
+        {
+            "SQLALCHEMY_DATABASE_URI": db_uri,
+            "WXFS_CACHE_CHECK_INTERVAL": 0,
+            **app_config,
+        }
+    )
+    with flask_app.app_context():
+        Base.metadata.create_all(bind=app_db.engine)
+    yield connexion_app
+
+
+@pytest.fixture()
+def flask_app(app):
+    return app.app
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture()
+def db_session(flask_app):
+    with flask_app.app_context():
+        engine = get_app_db().engine
+    sesh = sessionmaker(bind=engine)()
+    yield sesh
+    sesh.close()
+
+
+@pytest.fixture()
+def count_queries(flask_app):
+    """Return a context manager that collects the SQL statements executed
+    within it."""
+    with flask_app.app_context():
+        engine = get_app_db().engine
+
+    @contextlib.contextmanager
+    def counter():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    return counter
+
+
+@pytest.fixture()
+def make_locations(db_session, tmpdir):
+    """Insert `n` locations into the database, each with weather files for
+    `years` and a summary file. Files are created (with trivial content) so
+    that their content can be downloaded. Returns the list of Locations."""
+
+    def make(n, years=(2020, 2050), version="CMIP6", scenario="SSP5-8.5"):
+        locations = []
+        for i in range(n):
+            location = Location(
+                city=f"City {i}",
+                province="BC",
+                country="CAN",
+                code=f"{1000000 + i}",
+                longitude=-123.0 - i / 100,
+                latitude=49.0 + i / 100,
+                elevation=100.0 + i,
+            )
+            db_session.add(location)
+            for year in years:
+                p = tmpdir.join(f"{i}_{year}s.epw")
+                p.write(f"LOCATION,City {i},BC,CAN,CWEC2016\n")
+                db_session.add(
+                    WxFile(
+                        fileType="weather",
+                        filepath=str(p),
+                        scenario=scenario,
+                        version=version,
+                        location=location,
+                        creationDate=datetime.datetime(2020, 6, 23),
+                        dataSource="CWEC2016",
+                        designDataType="TMY",
+                        timePeriodStart=datetime.datetime(year - 10, 1, 1),
+                        timePeriodEnd=datetime.datetime(year + 19, 12, 31),
+                        ensembleStatistic="average",
+                        variables="all thermodynamic",
+                        anomaly="daily",
+                        smoothing=21,
+                    )
+                )
+            p = tmpdir.join(f"{i}_summary.xlsx")
+            p.write(f"Summary for City {i}")
+            db_session.add(
+                SummaryFile(
+                    fileType="summary",
+                    filepath=str(p),
+                    scenario=scenario,
+                    version=version,
+                    location=location,
+                )
+            )
+            locations.append(location)
+        db_session.commit()
+        return locations
+
+    return make
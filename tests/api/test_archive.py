@@ -0,0 +1,76 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+
+def archive_members(response):
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_archive(client, make_locations):
+    location = make_locations(2)[1]
+    response = client.get(f"/locations/{location.id}/archive")
+    assert response.headers["Content-Disposition"] == (
+        f'attachment; filename="{location.city}.zip"'
+    )
+    members = archive_members(response)
+    files = location.wx_files + location.summary_files
+    assert len(members) == len(files) == 3
+    for file in files:
+        with open(file.filepath, "rb") as f:
+            assert members[os.path.basename(file.filepath)] == f.read()
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("scenario=SSP5-8.5", 3),
+        ("scenario=SSP2-4.5", 0),
+        ("version=CMIP6", 3),
+        ("version=CMIP5", 0),
+        ("scenario=SSP5-8.5&version=CMIP5", 0),
+    ],
+)
+def test_archive_filters(query, expected, client, make_locations):
+    location = make_locations(1)[0]
+    response = client.get(f"/locations/{location.id}/archive?{query}")
+    assert len(archive_members(response)) == expected
+
+
+@pytest.mark.parametrize("name", ["big.epw", "big.xlsx"])
+def test_archive_streamed_in_chunks(name, tmpdir, monkeypatch):
+    from wxfs.api import archives
+
+    monkeypatch.setattr(archives, "chunk_size", 1024)
+    path = tmpdir.join(name)
+    content = os.urandom(256 * 1024)
+    path.write_binary(content)
+
+    chunks = list(archives.zip_stream([(str(path), name)]))
+    # Output is produced as input is read, not all at the end. Deflate buffers
+    # a little output of its own.
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 32 * 1024
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.read(name) == content
+
+
+def test_archive_not_found(client, make_locations):
+    make_locations(1)
+    assert client.get("/locations/999999/archive").status_code == 404
+
+
+def test_archive_missing_file(client, make_locations, caplog):
+    location = make_locations(1)[0]
+    missing = location.wx_files[0].filepath
+    os.remove(missing)
+    members = archive_members(client.get(f"/locations/{location.id}/archive"))
+    assert len(members) == 2
+    assert os.path.basename(missing) not in members
+    assert f"Omitting missing file {missing}" in caplog.text
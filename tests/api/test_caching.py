@@ -0,0 +1,30 @@
+import pytest
+
+from wxfs import get_app_cache
+from wxfs.indexer import commit
+
+
+@pytest.mark.parametrize("path", ["/locations", "/files", "/files?limit=100"])
+def test_listing_refreshed_on_new_generation(path, client, db_session, make_locations):
+    make_locations(1)
+    commit(db_session)
+    before = client.get(path).json()
+
+    # Changes to the catalog are not visible until the generation is bumped.
+    make_locations(1)
+    assert client.get(path).json() == before
+
+    commit(db_session)
+    after = client.get(path).json()
+    assert after != before
+
+
+@pytest.mark.parametrize("resource", ["locations", "files"])
+def test_single_item_cached(resource, client, make_locations):
+    make_locations(2)
+    get_app_cache().clear()
+    first = client.get(f"/{resource}/1").json()
+    second = client.get(f"/{resource}/1").json()
+    other = client.get(f"/{resource}/2").json()
+    assert first == second != other
+    assert get_app_cache().hits == 1
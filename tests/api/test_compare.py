@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+from connexion.exceptions import ProblemException
+
+from wxfs.api import comparison
+from wxfs.database import WxFile
+from wxfs.epw import read_data
+
+
+@pytest.fixture()
+def app_config(tmpdir):
+    return {"WXFS_SIDECAR_DIRECTORY": str(tmpdir.join("sidecars"))}
+
+
+@pytest.fixture()
+def location(db_session, make_locations, write_epw):
+    """Make locations, and write hourly data to the weather files of the first
+    one: 5 degrees warmer in the 2050s than the 2020s. Returns the location."""
+    location = make_locations(2)[0]
+    for wx_file in db_session.query(WxFile).filter_by(location_id=location.id):
+        mean = 5.0 if wx_file.timePeriodStart.year == 2010 else 10.0
+        write_epw(
+            wx_file.filepath,
+            "LOCATION,City 0,BC,CAN,CWEC2016",
+            mean_temperature=mean,
+        )
+    return location
+
+
+def compare(client, location, query=""):
+    return client.get(
+        f"/locations/{location.id}/compare"
+        f"?scenario=SSP5-8.5&from=2010&to=2040{query}"
+    )
+
+
+def test_compare_monthly(client, db_session, location):
+    response = compare(client, location, "&variables=dryBulbTemperature,windSpeed")
+    assert response.status_code == 200
+    body = response.json()
+    wx_files = {
+        wx_file.timePeriodStart.year: wx_file.id
+        for wx_file in db_session.query(WxFile).filter_by(location_id=location.id)
+    }
+    assert body["fromFileUri"] == f"/files/{wx_files[2010]}"
+    assert body["toFileUri"] == f"/files/{wx_files[2040]}"
+    assert body["resolution"] == "monthly"
+    assert body["hours"] == 8760
+    assert "time" not in body
+    assert set(body["variables"]) == {"dryBulbTemperature", "windSpeed"}
+
+    temperature = body["variables"]["dryBulbTemperature"]
+    assert temperature["from"]["mean"] == pytest.approx(5.0, abs=0.05)
+    assert temperature["to"]["mean"] == pytest.approx(10.0, abs=0.05)
+    assert temperature["delta"] == pytest.approx(
+        {"mean": 5.0, "min": 5.0, "max": 5.0}, abs=0.05
+    )
+    assert temperature["monthlyDelta"] == pytest.approx([5.0] * 12, abs=0.05)
+    assert "hourlyDelta" not in temperature
+    assert body["variables"]["windSpeed"]["monthlyDelta"] == [0.0] * 12
+
+
+def test_compare_hourly(client, db_session, location):
+    response = compare(
+        client, location, "&variables=dryBulbTemperature&resolution=hourly"
+    )
+    assert response.status_code == 200
+    body = response.json()
+    wx_files = {
+        wx_file.timePeriodStart.year: wx_file.filepath
+        for wx_file in db_session.query(WxFile).filter_by(location_id=location.id)
+    }
+    earlier, later = read_data(wx_files[2010]), read_data(wx_files[2040])
+    temperature = body["variables"]["dryBulbTemperature"]
+    assert temperature["hourlyDelta"] == pytest.approx(
+        later["dryBulbTemperature"] - earlier["dryBulbTemperature"], abs=1e-4
+    )
+    assert body["time"]["month"] == earlier["month"].tolist()
+    assert body["time"]["hour"] == earlier["hour"].tolist()
+
+
+def test_compare_cached_per_file_pair(client, location, monkeypatch):
+    assert compare(client, location).status_code == 200
+
+    def fail(*args):
+        raise AssertionError("comparison recomputed")
+
+    monkeypatch.setattr(comparison, "compare_data", fail)
+    response = compare(client, location)
+    assert response.status_code == 200
+    assert response.json()["hours"] == 8760
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "?scenario=SSP5-8.5&from=2010&to=2070",
+        "?scenario=RCP 8.5&from=2010&to=2040",
+    ],
+)
+def test_compare_not_found(query, client, location):
+    response = client.get(f"/locations/{location.id}/compare{query}")
+    assert response.status_code == 404
+
+
+def test_compare_without_data(client, location):
+    other = location.id + 1
+    response = client.get(
+        f"/locations/{other}/compare?scenario=SSP5-8.5&from=2010&to=2040"
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "?from=2010&to=2040",
+        "?scenario=SSP5-8.5&to=2040",
+        "?scenario=SSP5-8.5&from=2010&to=2040&resolution=daily",
+        "?scenario=SSP5-8.5&from=2010&to=2040&variables=colour",
+    ],
+)
+def test_compare_invalid(query, client, location):
+    response = client.get(f"/locations/{location.id}/compare{query}")
+    assert response.status_code == 400
+
+
+def test_compare_no_common_hours():
+    def data(month):
+        return {
+            "month": np.full(24, month, dtype="u1"),
+            "day": np.ones(24, dtype="u1"),
+            "hour": np.arange(1, 25, dtype="u1"),
+            "dryBulbTemperature": np.zeros(24, dtype="f4"),
+        }
+
+    with pytest.raises(ProblemException) as excinfo:
+        comparison.compare_data(data(1), data(2), ("dryBulbTemperature",))
+    assert excinfo.value.status == 422
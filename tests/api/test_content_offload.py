@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from wxfs import create_app, parse_prefix_map
+
+
+@pytest.fixture(params=["x-accel-redirect", "x-sendfile"])
+def app_config(request, tmpdir):
+    return {
+        "WXFS_CONTENT_OFFLOAD": request.param,
+        "WXFS_CONTENT_OFFLOAD_PREFIXES": [
+            ("/elsewhere/", "/nowhere/"),
+            (f"{tmpdir}/", "/protected/wx files/"),
+        ],
+    }
+
+
+def test_offload(app_config, client, db_session, make_locations):
+    locations = make_locations(1)
+    file = locations[0].wx_files[0]
+    basename = os.path.basename(file.filepath)
+
+    response = client.get(f"/files/{file.id}/content")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["Content-Disposition"] == f"attachment; filename={basename}"
+    if app_config["WXFS_CONTENT_OFFLOAD"] == "x-accel-redirect":
+        assert response.headers["X-Accel-Redirect"] == (
+            f"/protected/wx%20files/{basename}"
+        )
+        assert "X-Sendfile" not in response.headers
+    else:
+        assert response.headers["X-Sendfile"] == f"/protected/wx files/{basename}"
+        assert "X-Accel-Redirect" not in response.headers
+
+
+def test_invalid_offload_mode():
+    with pytest.raises(ValueError):
+        create_app({"WXFS_CONTENT_OFFLOAD": "carrier-pigeon"})
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("", []),
+        ("/a/=/b/", [("/a/", "/b/")]),
+        ("/a/=/b/, /c/=/d=e/", [("/a/", "/b/"), ("/c/", "/d=e/")]),
+    ],
+)
+def test_parse_prefix_map(text, expected):
+    assert parse_prefix_map(text) == expected
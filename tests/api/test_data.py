@@ -0,0 +1,135 @@
+import csv
+import io
+import os
+
+import pytest
+import yaml
+
+import wxfs
+from wxfs.api.hourly import data_variables
+from wxfs.database import WxFile, SummaryFile
+from wxfs.epw import read_data
+
+
+spec_path = "openapi/api-spec.yaml"
+
+
+@pytest.fixture()
+def app_config(tmpdir):
+    return {"WXFS_SIDECAR_DIRECTORY": str(tmpdir.join("sidecars"))}
+
+
+@pytest.fixture()
+def data_file(db_session, make_locations, write_epw):
+    """Make locations, and write hourly data to the first weather file.
+    Returns (its id, its hourly data)."""
+    make_locations(1)
+    wx_file = db_session.query(WxFile).order_by(WxFile.id).first()
+    write_epw(wx_file.filepath, "LOCATION,City 0,BC,CAN,CWEC2016")
+    return wx_file.id, read_data(wx_file.filepath)
+
+
+def test_spec_variables():
+    with open(os.path.join(os.path.dirname(wxfs.__file__), spec_path)) as file:
+        spec = yaml.safe_load(file)
+    variables = spec["components"]["parameters"]["dataVariables"]
+    assert tuple(variables["schema"]["items"]["enum"]) == data_variables
+
+
+def test_get_data(client, data_file):
+    id, data = data_file
+    response = client.get(f"/files/{id}/data")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    rows = response.json()
+    assert len(rows) == 8760
+    assert set(rows[0]) == {"month", "day", "hour", *data_variables}
+    assert rows[0]["month"] == 1 and rows[0]["day"] == 1 and rows[0]["hour"] == 1
+    assert [row["dryBulbTemperature"] for row in rows] == pytest.approx(
+        data["dryBulbTemperature"]
+    )
+
+
+def test_get_data_rounded(client, data_file):
+    id, data = data_file
+    rows = client.get(f"/files/{id}/data?variables=aerosolOpticalDepth").json()
+    # Stored as float32, sent as written.
+    assert rows[0]["aerosolOpticalDepth"] == 0.1
+    assert b"0.10000000" not in client.get(f"/files/{id}/data").content
+
+
+@pytest.mark.parametrize(
+    "query, months, hours",
+    [
+        ("start=07-01&end=07-31", {7}, 31 * 24),
+        ("start=07-01", set(range(7, 13)), 184 * 24),
+        ("end=01-31", {1}, 31 * 24),
+        ("start=07-04T13&end=07-04T14", {7}, 2),
+        ("start=12-31T24&end=01-01T01", {12, 1}, 2),
+        ("start=12-01&end=02-28", {12, 1, 2}, 90 * 24),
+    ],
+)
+def test_get_data_window(query, months, hours, client, data_file):
+    id, _ = data_file
+    response = client.get(f"/files/{id}/data?variables=dryBulbTemperature&{query}")
+    assert response.status_code == 200
+    rows = response.json()
+    assert len(rows) == hours
+    assert {row["month"] for row in rows} == months
+    assert set(rows[0]) == {"month", "day", "hour", "dryBulbTemperature"}
+
+
+def test_get_data_csv(client, data_file):
+    id, data = data_file
+    response = client.get(
+        f"/files/{id}/data?variables=dryBulbTemperature,windSpeed"
+        f"&start=07-01&end=07-31&format=csv"
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == ["month", "day", "hour", "dryBulbTemperature", "windSpeed"]
+    assert len(rows) == 1 + 31 * 24
+    july = data["dryBulbTemperature"][data["month"] == 7]
+    assert [float(row[3]) for row in rows[1:]] == pytest.approx(july)
+
+
+def test_get_data_csv_empty(client, data_file):
+    id, _ = data_file
+    response = client.get(f"/files/{id}/data?start=02-30&end=02-30&format=csv")
+    assert response.status_code == 200
+    assert response.text.splitlines() == ["month,day,hour," + ",".join(data_variables)]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["start=7-1", "end=13-01", "start=01-01T25", "variables=colour", "format=xml"],
+)
+def test_get_data_invalid(query, client, data_file):
+    id, _ = data_file
+    assert client.get(f"/files/{id}/data?{query}").status_code == 400
+
+
+def test_get_data_not_found(client, db_session, data_file):
+    id, _ = data_file
+    without = (
+        # Weather file without hourly data.
+        db_session.query(WxFile.id).filter(WxFile.id != id).first().id,
+        db_session.query(SummaryFile.id).first().id,
+        999999,
+    )
+    for other in without:
+        assert client.get(f"/files/{other}/data").status_code == 404
+
+
+def test_get_data_file_missing(client, data_file, db_session):
+    id, _ = data_file
+    os.remove(db_session.get(WxFile, id).filepath)
+    assert client.get(f"/files/{id}/data").status_code == 404
+
+
+def test_get_data_sidecar_directory_unusable(tmpdir, client, data_file):
+    id, _ = data_file
+    # A file where the sidecar directory should be.
+    tmpdir.join("sidecars").write("")
+    assert client.get(f"/files/{id}/data").status_code == 500
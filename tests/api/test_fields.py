@@ -0,0 +1,86 @@
+import pytest
+
+
+all_location_keys = {
+    "id",
+    "selfUri",
+    "city",
+    "province",
+    "country",
+    "code",
+    "latitude",
+    "longitude",
+    "elevation",
+    "files",
+}
+
+
+@pytest.mark.parametrize(
+    "query, expected_keys",
+    [
+        ("", all_location_keys),
+        ("?fields=id,city", {"id", "city", "files"}),
+        (
+            "?fields=id,city,latitude,longitude&include=none",
+            {"id", "city", "latitude", "longitude"},
+        ),
+        ("?include=ids", all_location_keys),
+    ],
+)
+@pytest.mark.parametrize("path", ["/locations", "/locations/{id}"])
+def test_location_fields(path, query, expected_keys, client, make_locations):
+    locations = make_locations(2)
+    response = client.get(path.format(id=locations[0].id) + query)
+    assert response.status_code == 200
+    body = response.json()
+    items = body if isinstance(body, list) else [body]
+    for item in items:
+        assert set(item) == expected_keys
+
+
+def test_location_include_ids(client, make_locations):
+    location = make_locations(1)[0]
+    full = client.get(f"/locations/{location.id}").json()
+    ids = client.get(f"/locations/{location.id}?include=ids").json()
+    assert ids["files"] == [file["id"] for file in full["files"]]
+
+
+def test_location_include_none_skips_files(client, count_queries, make_locations):
+    make_locations(3)
+    with count_queries() as statements:
+        response = client.get("/locations?include=none")
+    assert response.status_code == 200
+    assert not any("files" in statement for statement in statements)
+
+
+def test_location_fields_invalid(client, make_locations):
+    make_locations(1)
+    assert client.get("/locations?fields=id,colour").status_code == 400
+    assert client.get("/locations?include=everything").status_code == 400
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        ["id", "fileType"],
+        ["id", "contentUri", "scenario", "version"],
+        ["id", "timePeriod", "designDataType"],
+    ],
+)
+def test_file_fields(fields, client, make_locations):
+    make_locations(2)
+    full = client.get("/files").json()
+    response = client.get(f"/files?fields={','.join(fields)}")
+    assert response.status_code == 200
+    sparse = response.json()
+    assert sparse == [
+        {name: file[name] for name in fields if name in file} for file in full
+    ]
+
+
+def test_file_fields_base_table_only(client, count_queries, make_locations):
+    make_locations(2)
+    with count_queries() as statements:
+        response = client.get("/files?fields=id,filepath,scenario")
+    assert response.status_code == 200
+    assert not any("wx_files" in statement for statement in statements)
@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.fixture()
+def catalog(make_locations):
+    """Locations 1, 2: CMIP6 SSP5-8.5; locations 3, 4: CMIP5 RCP 8.5.
+    Each location has weather files for the 2020s and 2050s, and a summary file.
+    """
+    make_locations(2, years=(2020, 2050), version="CMIP6", scenario="SSP5-8.5")
+    make_locations(2, years=(2020, 2050), version="CMIP5", scenario="RCP 8.5")
+
+
+def listing(client, query):
+    response = client.get(f"/files?{query}")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize(
+    "query, expected_count",
+    [
+        ("", 12),
+        ("version=CMIP6", 6),
+        ("scenario=RCP 8.5", 6),
+        ("scenario=RCP 8.5&version=CMIP6", 0),
+        ("location_id=1", 3),
+        ("designDataType=TMY", 8),
+        ("designDataType=XMY", 0),
+        ("ensembleStatistic=average&version=CMIP5", 4),
+        # 2020s: 2010-01-01 -- 2039-12-31; 2050s: 2040-01-01 -- 2069-12-31
+        ("timePeriodStart=2045-01-01", 4),
+        ("timePeriodEnd=2030-01-01", 4),
+        ("timePeriodStart=2030-01-01&timePeriodEnd=2045-01-01", 8),
+        ("timePeriodStart=2039-12-31T00:00:00&timePeriodEnd=2039-12-31", 4),
+        ("timePeriodStart=2070-01-01", 0),
+    ],
+)
+def test_filters(query, expected_count, client, catalog):
+    assert len(listing(client, query)) == expected_count
+
+
+def test_filter_values(client, catalog):
+    files = listing(client, "version=CMIP5&timePeriodStart=2045-01-01")
+    assert {file["version"] for file in files} == {"CMIP5"}
+    assert {file["timePeriod"]["start"] for file in files} == {"2040-01-01T00:00:00Z"}
+
+
+def test_filters_with_paging(client, catalog):
+    page = client.get("/files?version=CMIP5&limit=4")
+    assert len(page.json()) == 4
+    assert "version=CMIP5" in page.headers["Link"]
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["timePeriodStart=sometime", "designDataType=XYZ", "location_id=here"],
+)
+def test_invalid_filters(query, client, catalog):
+    assert client.get(f"/files?{query}").status_code == 400
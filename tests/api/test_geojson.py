@@ -0,0 +1,37 @@
+import pytest
+
+
+def geojson(client, query=""):
+    response = client.get(f"/locations.geojson?{query}")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/geo+json"
+    collection = response.json()
+    assert collection["type"] == "FeatureCollection"
+    return collection["features"]
+
+
+def test_points(client, make_locations):
+    # Location i is at (49 + i/100, -123 - i/100)
+    make_locations(5)
+    features = geojson(client)
+    assert len(features) == 5
+    feature = features[0]
+    assert feature["geometry"]["type"] == "Point"
+    assert set(feature["properties"]) == {"id", "city", "province", "code"}
+
+
+def test_bbox(client, make_locations):
+    make_locations(5)
+    features = geojson(client, "bbox=-123.025,48,-122,50")
+    assert {f["properties"]["city"] for f in features} == {"City 0", "City 1", "City 2"}
+
+
+def test_clustered(client, make_locations):
+    make_locations(5)
+    [feature] = geojson(client, "zoom=3")
+    assert feature["properties"] == {"cluster": True, "point_count": 5}
+
+
+@pytest.mark.parametrize("query", ["bbox=1,2,3", "zoom=-1", "bbox=a,b,c,d"])
+def test_invalid(query, client):
+    assert client.get(f"/locations.geojson?{query}").status_code == 400
@@ -0,0 +1,49 @@
+import pytest
+
+
+@pytest.fixture()
+def catalog(db_session, make_locations):
+    locations = make_locations(3)
+    for location, city in zip(locations, ["Montréal", "Mont-Joli", "Vancouver"]):
+        location.city = city
+    db_session.commit()
+
+
+def search(client, query):
+    response = client.get(f"/locations/search?{query}")
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("q=montreal", ["Montréal"]),
+        ("q=MONT", ["Montréal", "Mont-Joli"]),
+        ("q=mont&limit=1", ["Montréal"]),
+        ("q=1000002&limit=1", ["Vancouver"]),
+        ("q=nowhere", []),
+    ],
+)
+def test_search(query, expected, client, catalog):
+    assert [location["city"] for location in search(client, query)] == expected
+
+
+def test_search_result_is_compact(client, catalog):
+    [location] = search(client, "q=vanc")
+    assert set(location) == {
+        "id",
+        "selfUri",
+        "city",
+        "province",
+        "country",
+        "code",
+        "latitude",
+        "longitude",
+    }
+    assert location["selfUri"] == f"/locations/{location['id']}"
+
+
+@pytest.mark.parametrize("query", ["", "q=", "q=a&limit=0"])
+def test_invalid(query, client):
+    assert client.get(f"/locations/search?{query}").status_code == 400
@@ -0,0 +1,63 @@
+import pytest
+
+from wxfs import get_app_cache
+from wxfs.indexer import commit
+
+
+def nearest(client, query):
+    response = client.get(f"/locations/nearest?{query}")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_nearest(client, make_locations):
+    # Location i is at (49 + i/100, -123 - i/100)
+    make_locations(10)
+    result = nearest(client, "lat=49.031&lon=-123.031&k=3")
+    assert [location["city"] for location in result] == ["City 3", "City 4", "City 2"]
+    distances = [location["distance"] for location in result]
+    assert distances == sorted(distances)
+    assert distances[0] < 1
+    assert len(result[0]["files"]) == 3
+
+
+def test_nearest_default_k(client, make_locations):
+    make_locations(12)
+    assert len(nearest(client, "lat=0&lon=0")) == 10
+
+
+def test_index_built_once_per_generation(client, db_session, make_locations):
+    make_locations(3)
+    commit(db_session)
+    nearest(client, "lat=49&lon=-123&k=1")
+    misses = get_app_cache().misses
+    nearest(client, "lat=50&lon=-120&k=1")
+    assert get_app_cache().misses == misses
+
+    make_locations(1)
+    commit(db_session)
+    assert len(nearest(client, "lat=49&lon=-123&k=10")) == 4
+
+
+@pytest.mark.parametrize(
+    "query", ["lat=91&lon=0", "lat=0", "lat=0&lon=0&k=0", "lat=0&lon=0&k=101"]
+)
+def test_invalid(query, client):
+    assert client.get(f"/locations/nearest?{query}").status_code == 400
+
+
+def test_nearest_skips_deleted_locations(client, db_session, make_locations):
+    locations = make_locations(3)
+    nearest(client, "lat=49&lon=-123&k=3")
+
+    # Deleted without bumping the catalog generation, as if within the cache
+    # check interval: the cached spatial index still holds the location.
+    deleted = locations[0]
+    for file in deleted.wx_files + deleted.summary_files:
+        db_session.delete(file)
+    db_session.delete(deleted)
+    db_session.commit()
+
+    result = nearest(client, "lat=49&lon=-123&k=3")
+    assert [location["city"] for location in result] == ["City 1", "City 2"]
+    assert all(location["distance"] > 0 for location in result)
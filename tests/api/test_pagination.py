@@ -0,0 +1,58 @@
+import re
+
+import pytest
+
+
+def next_uri(response):
+    link = response.headers.get("Link")
+    if link is None:
+        return None
+    match = re.match(r'<(?P<uri>[^>]+)>; rel="next"', link)
+    assert match
+    return match.group("uri")
+
+
+@pytest.mark.parametrize("path", ["/locations", "/files"])
+def test_unpaged_listing(path, client, make_locations):
+    make_locations(5)
+    response = client.get(path)
+    assert response.status_code == 200
+    assert "Link" not in response.headers
+    items = response.json()
+    ids = [item["id"] for item in items]
+    assert ids == sorted(ids)
+
+
+@pytest.mark.parametrize("path", ["/locations", "/files"])
+@pytest.mark.parametrize("limit", [1, 2, 4, 100])
+def test_paged_listing(path, limit, client, make_locations):
+    make_locations(5)
+    everything = client.get(path).json()
+
+    paged = []
+    uri = f"{path}?limit={limit}"
+    while uri is not None:
+        response = client.get(uri)
+        assert response.status_code == 200
+        page = response.json()
+        assert 0 < len(page) <= limit
+        paged += page
+        uri = next_uri(response)
+
+    assert paged == everything
+
+
+def test_after_cursor(client, make_locations):
+    locations = make_locations(3)
+    after = locations[0].id
+    response = client.get(f"/locations?after={after}&limit=10")
+    assert [item["id"] for item in response.json()] == [
+        location.id for location in locations[1:]
+    ]
+    assert "Link" not in response.headers
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_invalid_limit(limit, client):
+    response = client.get(f"/files?limit={limit}")
+    assert response.status_code == 400
@@ -0,0 +1,67 @@
+import pytest
+
+
+@pytest.fixture()
+def listing(make_locations):
+    make_locations(10)
+
+
+@pytest.mark.parametrize("path", ["/locations", "/files", "/files?limit=2"])
+def test_etag(path, client, listing):
+    response = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["ETag"].startswith('"')
+    assert response.headers["Cache-Control"] == "public, no-cache"
+    assert "Content-Encoding" not in response.headers
+
+    again = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert again.headers["ETag"] == response.headers["ETag"]
+    assert again.content == response.content
+
+
+@pytest.mark.parametrize("path", ["/locations", "/files?limit=2"])
+def test_not_modified(path, client, count_queries, listing):
+    response = client.get(path)
+    etag = response.headers["ETag"]
+
+    with count_queries() as statements:
+        not_modified = client.get(path, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.headers.get("Link") == response.headers.get("Link")
+    # Only the catalog generation is checked.
+    assert len(statements) <= 1
+
+
+def test_not_modified_across_encodings(client, listing):
+    response = client.get("/locations", headers={"Accept-Encoding": "gzip"})
+    not_modified = client.get(
+        "/locations",
+        headers={
+            "Accept-Encoding": "identity",
+            "If-None-Match": response.headers["ETag"],
+        },
+    )
+    assert not_modified.status_code == 304
+
+
+def test_modified(client, listing):
+    response = client.get("/locations", headers={"If-None-Match": '"nope"'})
+    assert response.status_code == 200
+
+
+def test_gzip(client, listing):
+    identity = client.get("/locations", headers={"Accept-Encoding": "identity"})
+    response = client.get("/locations", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] != identity.headers["ETag"]
+    assert response.content == identity.content  # Client decompresses
+    assert int(response.headers["Content-Length"]) < len(identity.content)
+
+
+def test_brotli(client, listing):
+    pytest.importorskip("brotli")
+    response = client.get("/locations", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
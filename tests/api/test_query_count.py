@@ -0,0 +1,26 @@
+import pytest
+
+from wxfs import get_app_cache
+
+
+def query_count(client, count_queries, path):
+    with count_queries() as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize(
+    "path",
+    ["/locations", "/locations?limit=1000", "/files", "/files?limit=1000"],
+)
+def test_listing_query_count_is_constant(path, client, count_queries, make_locations):
+    make_locations(2)
+    few = query_count(client, count_queries, path)
+
+    # Don't let caching hide the database activity.
+    get_app_cache().clear()
+    make_locations(20)
+    many = query_count(client, count_queries, path)
+
+    assert many == few
@@ -0,0 +1,42 @@
+import pytest
+from flask import url_for
+
+from wxfs.api.serialization import compile_rep, uri_template
+
+
+@pytest.mark.parametrize(
+    "endpoint",
+    [
+        ".wxfs_api_files_get",
+        ".wxfs_api_files_getContent",
+        ".wxfs_api_locations_get",
+    ],
+)
+@pytest.mark.parametrize("id", [0, 1, 42, 2147483647, 10**12])
+def test_uri_template(endpoint, id, app, flask_app):
+    # The API's routes are registered when the app starts up.
+    with app.test_client():
+        pass
+    with flask_app.test_request_context("/files"):
+        assert uri_template(endpoint)(id) == url_for(endpoint, id=id)
+
+
+@pytest.mark.parametrize(
+    "fields, expected",
+    [
+        (None, {"a": 1, "b": 2, "ab": 3}),
+        (["b"], {"b": 2}),
+        (["ab", "a", "c"], {"a": 1, "ab": 3}),
+        ([], {}),
+    ],
+)
+def test_compile_rep(fields, expected):
+    rep = compile_rep(
+        {
+            "a": lambda item: item[0],
+            "b": lambda item: item[1],
+            "ab": lambda item: item[0] + item[1],
+        },
+        fields,
+    )
+    assert rep((1, 2)) == expected
@@ -0,0 +1,62 @@
+import pytest
+
+from wxfs.database import WxFile, SummaryFile, WxFileStats
+from wxfs.epw import climate_stats, read_data
+
+
+@pytest.fixture()
+def stats_files(db_session, make_locations, tmpdir, write_epw):
+    """Make locations, and add climate statistics to the weather files of the
+    first one. Returns (ids of files with statistics, the statistics)."""
+    locations = make_locations(2)
+    path = write_epw(tmpdir.join("data.epw"), "LOCATION,City 0,BC,CAN,CWEC2016")
+    stats = climate_stats(read_data(path))
+    ids = []
+    for wx_file in db_session.query(WxFile).filter_by(location_id=locations[0].id):
+        db_session.add(WxFileStats(id=wx_file.id, **stats))
+        ids.append(wx_file.id)
+    db_session.commit()
+    return ids, stats
+
+
+def test_get_stats(client, stats_files):
+    ids, stats = stats_files
+    response = client.get(f"/files/{ids[0]}/stats")
+    assert response.status_code == 200
+    body = response.json()
+    assert body.pop("fileUri") == f"/files/{ids[0]}"
+    assert body == pytest.approx(stats)
+
+
+def test_get_stats_not_found(client, db_session, stats_files):
+    ids, _ = stats_files
+    without = (
+        db_session.query(WxFile.id).filter(WxFile.id.notin_(ids)).first().id,
+        db_session.query(SummaryFile.id).first().id,
+        999999,
+    )
+    for id in without:
+        assert client.get(f"/files/{id}/stats").status_code == 404
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_files_stats_field(stream, client, stats_files):
+    ids, stats = stats_files
+    response = client.get(
+        f"/files?fields=id,fileType,stats&stream={str(stream).lower()}"
+    )
+    assert response.status_code == 200
+    for file in response.json():
+        if file["fileType"] == "summary":
+            assert set(file) == {"id", "fileType"}
+        elif file["id"] in ids:
+            assert file["stats"] == pytest.approx(stats)
+        else:
+            assert file["stats"] is None
+
+
+def test_files_stats_not_by_default(client, count_queries, stats_files):
+    with count_queries() as statements:
+        files = client.get("/files").json()
+    assert not any("stats" in file for file in files)
+    assert not any("wx_file_stats" in statement for statement in statements)
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+import wxfs.api.streaming
+from wxfs.api.streaming import json_array_chunks
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "",
+        "&fields=id,filepath",
+        "&scenario=SSP5-8.5&timePeriodStart=2040-01-01",
+        "&version=CMIP5",
+    ],
+)
+def test_streamed_listing_matches_listing(query, client, make_locations):
+    make_locations(3)
+    expected = client.get(f"/files?{query}").json()
+    response = client.get(f"/files?stream=true{query}")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+    assert response.json() == expected
+
+
+def test_streamed_listing_excludes_paging(client, make_locations):
+    make_locations(1)
+    assert client.get("/files?stream=true&limit=10").status_code == 400
+    assert client.get("/files?stream=true&after=1").status_code == 400
+
+
+@pytest.mark.parametrize("n", [0, 1, 5, 6, 12])
+def test_json_array_chunks(n, flask_app, monkeypatch):
+    monkeypatch.setattr(wxfs.api.streaming, "batch_size", 3)
+    with flask_app.app_context():
+        chunks = list(json_array_chunks(range(n), lambda i: {"i": i}))
+    assert json.loads(b"".join(chunks)) == [{"i": i} for i in range(n)]
+    # One chunk per batch, and one to close the array.
+    assert len(chunks) == n // 3 + 1
@@ -0,0 +1,43 @@
+import datetime
+import math
+
+import pytest
+
+
+@pytest.fixture()
+def write_epw():
+    """Write an EPW file with the given first (LOCATION) line and synthetic
+    hourly data for a year: dry-bulb temperature follows annual and daily
+    cycles around mean `mean_temperature`. Returns the path."""
+
+    def write(path, location_line, mean_temperature=5.0, year=2050):
+        lines = [location_line]
+        lines += [
+            "DESIGN CONDITIONS,0",
+            "TYPICAL/EXTREME PERIODS,0",
+            "GROUND TEMPERATURES,0",
+            "HOLIDAYS/DAYLIGHT SAVINGS,No,0,0,0",
+            "COMMENTS 1,Synthetic data",
+            "COMMENTS 2,Synthetic data",
+            "DATA PERIODS,1,1,Data,Sunday, 1/ 1,12/31",
+        ]
+        start = datetime.datetime(2021, 1, 1)
+        for i in range(8760):
+            time = start + datetime.timedelta(hours=i)
+            temperature = (
+                mean_temperature
+                - 15 * math.cos(2 * math.pi * i / 8760)
+                - 4 * math.cos(2 * math.pi * (i % 24) / 24)
+            )
+            lines.append(
+                f"{year},{time.month},{time.day},{time.hour + 1},60,"
+                f"?9?9?9?9E0?9?9?9?9?9?9?9?9?9?9?9?9?9?9?9*9*9?9?9?9,"
+                f"{temperature:.1f},{temperature - 5:.1f},70,100000,0,0,300,"
+                f"{i % 24 * 10},0,0,0,0,0,0,{i % 360},{i % 10 / 2:.1f},5,5,20.0,"
+                f"77777,9,999999999,10,0.1,0,88,0.2,0.0,0.0"
+            )
+        with open(path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        return str(path)
+
+    return write
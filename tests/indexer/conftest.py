@@ -45,6 +45,48 @@ OTHER STUFF
     return make
 
 
+@pytest.fixture()
+def write_location_dir(write_epw):
+    """Write location directory number `i` in `collection` (a py.path), with
+    (format 1) weather files for `years` and a summary file. Weather files
+    contain hourly data only if `data` is true. Returns the location
+    directory."""
+
+    def write(collection, i, years=(2020, 2050, 2080), data=False):
+        city, code = f"City{i}", f"{100000 + i}"
+        lat, lon = 49.0 + i / 100, -123.0 - i / 100
+        location = collection.ensure(city, dir=True)
+        for year in years:
+            path = location.join(f"{year}s_CAN_BC_{city}.{code}_CWEC2016.epw")
+            header = (
+                f"LOCATION,{city},BC,CAN,CWEC2016,{code},{lat},{lon},-8.0,10.0 "
+                f"| Morphed:TAS,RHS,DWPT,PS | File Version: 2.1 "
+                f"| Creation Date: 2020-06-23"
+            )
+            if data:
+                write_epw(path, header, mean_temperature=(year - 2000) / 10)
+            else:
+                path.write(f"{header}\nOTHER STUFF\n")
+        location.join(f"{city}_summary.xlsx").write("summary")
+        return location
+
+    return write
+
+
+@pytest.fixture()
+def make_location_collection(tmpdir, write_location_dir):
+    """Make a collection directory containing `n` location directories (see
+    `write_location_dir`). Returns the path of the collection directory."""
+
+    def make(n, years=(2020, 2050, 2080), name="collection", data=False):
+        collection = tmpdir.mkdir(name)
+        for i in range(n):
+            write_location_dir(collection, i, years, data)
+        return str(collection)
+
+    return make
+
+
 @pytest.fixture()
 def db_uri():
     with testing.postgresql.Postgresql() as pg:
@@ -0,0 +1,105 @@
+import os
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import wxfs.indexer
+from wxfs.database import (
+    CatalogGeneration,
+    File,
+    IndexCheckpoint,
+    Location,
+    ManifestEntry,
+)
+from wxfs.indexer import index_location_collection, commit
+from wxfs.indexer.checkpoint import load_checkpoint
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_commit_every(bulk, db_session, make_location_collection):
+    collection = make_location_collection(5)
+
+    count = index_location_collection(
+        db_session, "CMIP5", collection, bulk=bulk, commit_every=2
+    )
+    assert count == 5 * 4
+    # Work is committed after every 2 locations, and the session cleared.
+    assert db_session.query(CatalogGeneration.generation).scalar() == 2
+    assert len(db_session.identity_map) == 0
+    commit(db_session)
+
+    assert db_session.query(Location).count() == 5
+    assert db_session.query(File).count() == 5 * 4
+    assert db_session.query(CatalogGeneration.generation).scalar() == 3
+    assert db_session.query(IndexCheckpoint).count() == 0
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_resume(bulk, db_engine, make_location_collection, monkeypatch, caplog):
+    Session = sessionmaker(bind=db_engine)
+    collection = make_location_collection(5)
+    parse_location = wxfs.indexer.parse_location
+
+    def crashing_parse_location(filepath, **kwargs):
+        if os.path.basename(filepath) == "City3":
+            raise Crash()
+        return parse_location(filepath, **kwargs)
+
+    monkeypatch.setattr(wxfs.indexer, "parse_location", crashing_parse_location)
+    sesh = Session()
+    with pytest.raises(Crash):
+        index_location_collection(sesh, "CMIP5", collection, bulk=bulk, commit_every=1)
+    sesh.rollback()
+    # Work on the locations before the crash survives it.
+    assert sesh.query(Location).count() == 3
+    assert load_checkpoint(sesh, collection) == "City2"
+    sesh.close()
+
+    monkeypatch.setattr(wxfs.indexer, "parse_location", parse_location)
+    sesh = Session()
+    count = index_location_collection(
+        sesh, "CMIP5", collection, bulk=bulk, commit_every=1, resume=True
+    )
+    commit(sesh)
+    assert "Resuming after location directory City2" in caplog.messages
+    assert count == 2 * 4
+    assert sesh.query(Location).count() == 5
+    assert sesh.query(File).count() == 5 * 4
+    assert load_checkpoint(sesh, collection) is None
+    sesh.close()
+
+
+def test_resume_incremental(db_engine, make_location_collection, monkeypatch):
+    Session = sessionmaker(bind=db_engine)
+    collection = make_location_collection(5)
+    parse_location = wxfs.indexer.parse_location
+
+    def crashing_parse_location(filepath, **kwargs):
+        if os.path.basename(filepath) == "City3":
+            raise Crash()
+        return parse_location(filepath, **kwargs)
+
+    monkeypatch.setattr(wxfs.indexer, "parse_location", crashing_parse_location)
+    sesh = Session()
+    with pytest.raises(Crash):
+        index_location_collection(
+            sesh, "CMIP5", collection, incremental=True, commit_every=1
+        )
+    sesh.close()
+
+    monkeypatch.setattr(wxfs.indexer, "parse_location", parse_location)
+    sesh = Session()
+    count = index_location_collection(
+        sesh, "CMIP5", collection, incremental=True, commit_every=1, resume=True
+    )
+    commit(sesh)
+    assert count == 2 * 4
+    # The locations committed before the crash are not found removed.
+    assert sesh.query(Location).count() == 5
+    assert sesh.query(File).count() == 5 * 4
+    assert sesh.query(ManifestEntry).count() == 5 * 4
+    sesh.close()
@@ -0,0 +1,63 @@
+import pytest
+
+from wxfs.indexer.file_parsing import get_wx_file_info
+from wxfs.indexer.headers import header_size, read_header, scan_header
+
+
+@pytest.mark.parametrize(
+    "scenario, version",
+    [("RCP85", 1), ("RCP85", 2), ("SSP245", 2), ("SSP585", 2)],
+)
+def test_scan_header(scenario, version, make_wx_file):
+    filepath = make_wx_file(
+        2050, "Anyville", "999999", -124.5, 50.0, 10.0, scenario, version
+    )
+    with open(filepath, "r") as wx_file:
+        expected = get_wx_file_info(wx_file)
+    assert expected[0] is not None and expected[1] is not None
+    assert scan_header(filepath) == expected
+
+
+@pytest.mark.parametrize(
+    "name, content",
+    [
+        # Format 1 with too many metadata parts.
+        (
+            "2050s_CAN_BC_City.100000_CWEC2016.epw",
+            "LOCATION,City,BC,CAN,CWEC2016,100000,49.0,-123.0,-8.0,10.0 | a | b | c | d\n",
+        ),
+        # Format 2 without a creation date line.
+        (
+            "MORPHED_RCP85_2050s_CAN_BC_City.100000_CWEC2016.epw",
+            "LOCATION,City,BC,CAN,CWEC2016,100000,49.0,-123.0,-8.0,10.0\n"
+            "COMMENTS 1, Future-shifted for the RCP85 scenario.\n"
+            + "OTHER STUFF\n" * 20,
+        ),
+        # Unparseable location and file name.
+        (
+            "City.epw",
+            "LOCATION,City\n"
+            "COMMENTS 1, RCP85\n"
+            "COMMENTS 2, Creation Date: 2020-06-23\n",
+        ),
+        # Windows line endings.
+        (
+            "2050s_CAN_BC_City.100000_CWEC2016.epw",
+            "LOCATION,City,BC,CAN,CWEC2016,100000,49.0,-123.0,-8.0,10.0 "
+            "| Morphed:TAS | File Version: 2.1 | Creation Date: 2020-06-23\r\n"
+            "OTHER STUFF\r\n",
+        ),
+    ],
+)
+def test_scan_header_matches_get_wx_file_info(name, content, tmpdir):
+    path = tmpdir.join(name)
+    path.write_binary(content.encode())
+    with open(str(path), "r") as wx_file:
+        expected = get_wx_file_info(wx_file)
+    assert scan_header(str(path)) == expected
+
+
+def test_read_header_is_bounded(tmpdir):
+    path = tmpdir.join("big.epw")
+    path.write("x" * (10 * header_size))
+    assert len(read_header(str(path))) == header_size
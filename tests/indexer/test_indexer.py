@@ -1,9 +1,20 @@
 import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
 
 import datetime
+import os
 
-from wxfs.indexer import index_wx_file
-from wxfs.database import Location, WxFile
+from wxfs import columnar, epw
+from wxfs.indexer import index_wx_file, index_location_collection, commit
+from wxfs.database import (
+    Location,
+    File,
+    WxFile,
+    WxFileStats,
+    SummaryFile,
+    CatalogGeneration,
+)
 
 
 @pytest.mark.parametrize(
@@ -62,3 +73,195 @@ def test_index_many_wx_files(
 
     wx_file_q = db_session.query(WxFile)
     assert wx_file_q.count() == len(years)
+
+
+def test_commit_bumps_catalog_generation(db_session):
+    assert db_session.query(CatalogGeneration).count() == 0
+    commit(db_session)
+    assert db_session.query(CatalogGeneration.generation).scalar() == 1
+    commit(db_session)
+    assert db_session.query(CatalogGeneration.generation).scalar() == 2
+
+
+def catalog(sesh):
+    """Return the indexed files, as comparable tuples, in filepath order."""
+    return [
+        (file.filepath, file.fileType, file.scenario, file.location.code)
+        for file in sesh.query(File).order_by(File.filepath)
+    ]
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+@pytest.mark.parametrize("workers", [None, 1, 4])
+def test_index_location_collection(
+    workers, bulk, db_session, make_location_collection
+):
+    collection = make_location_collection(5)
+    count = index_location_collection(
+        db_session, "CMIP5", collection, workers=workers, bulk=bulk
+    )
+    commit(db_session)
+
+    assert count == 5 * 4
+    assert db_session.query(Location).count() == 5
+    assert db_session.query(WxFile).count() == 5 * 3
+    assert db_session.query(SummaryFile).count() == 5
+    assert all(
+        filepath.startswith(collection) for filepath, *_ in catalog(db_session)
+    )
+
+    # Re-indexing adds nothing.
+    count = index_location_collection(
+        db_session, "CMIP5", collection, workers=workers, bulk=bulk
+    )
+    commit(db_session)
+    assert count == 5 * 4
+    assert db_session.query(File).count() == 5 * 4
+
+
+@pytest.mark.parametrize(
+    "options", [{"workers": 3}, {"bulk": True}, {"workers": 3, "bulk": True}]
+)
+def test_index_location_collection_matches_serial(
+    options, db_engine, make_location_collection
+):
+    collection = make_location_collection(8)
+    results = []
+    for kwargs in ({}, options):
+        sesh = sessionmaker(bind=db_engine)()
+        index_location_collection(sesh, "CMIP6", collection, **kwargs)
+        results.append(catalog(sesh))
+        sesh.rollback()
+        sesh.close()
+    assert results[0] == results[1]
+
+
+def test_bulk_index_recognizes_indexed_files(db_session, make_location_collection):
+    index_location_collection(
+        db_session, "CMIP5", make_location_collection(3, name="first")
+    )
+    commit(db_session)
+    index_location_collection(
+        db_session, "CMIP5", make_location_collection(5, name="second"), bulk=True
+    )
+    commit(db_session)
+    # The first 3 locations in the second collection are the same as those in
+    # the first, so only the other 2 locations, and their files, are new.
+    assert db_session.query(Location).count() == 5
+    assert db_session.query(File).count() == 5 * 4
+
+
+def test_bulk_index_statement_count(db_engine, make_location_collection):
+    def statement_count(n):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        sesh = sessionmaker(bind=db_engine)()
+        collection = make_location_collection(n, name=f"collection{n}")
+        event.listen(db_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            index_location_collection(sesh, "CMIP5", collection, bulk=True)
+        finally:
+            event.remove(db_engine, "before_cursor_execute", before_cursor_execute)
+            sesh.rollback()
+            sesh.close()
+        return len(statements)
+
+    assert statement_count(20) == statement_count(2)
+
+
+def climate_stats_by_file(sesh):
+    return {
+        wx_file.filepath: (
+            wx_file.stats.meanDryBulbTemperature,
+            wx_file.stats.heatingDegreeDays,
+        )
+        for wx_file in sesh.query(WxFile).filter(WxFile.stats.has())
+    }
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_index_climate_stats(bulk, db_session, make_location_collection):
+    collection = make_location_collection(2, years=(2020, 2050), data=True)
+    index_location_collection(
+        db_session, "CMIP5", collection, bulk=bulk, climate_stats=True
+    )
+    commit(db_session)
+
+    stats = climate_stats_by_file(db_session)
+    assert len(stats) == 2 * 2
+    for filepath, (mean, heating_degree_days) in stats.items():
+        # See fixture write_location_dir.
+        year = 2050 if "2050s" in filepath else 2020
+        assert mean == pytest.approx((year - 2000) / 10, abs=0.05)
+        assert heating_degree_days > 0
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_index_climate_stats_of_indexed_files(
+    bulk, db_session, make_location_collection
+):
+    collection = make_location_collection(2, years=(2020, 2050), data=True)
+    index_location_collection(db_session, "CMIP5", collection)
+    commit(db_session)
+    assert db_session.query(WxFileStats).count() == 0
+
+    # Re-indexing with climate statistics adds them to the files already indexed.
+    index_location_collection(
+        db_session, "CMIP5", collection, bulk=bulk, climate_stats=True
+    )
+    commit(db_session)
+    assert db_session.query(File).count() == 2 * 3
+    assert db_session.query(WxFileStats).count() == 2 * 2
+
+
+def test_index_climate_stats_without_data(db_session, make_location_collection):
+    collection = make_location_collection(2)
+    count = index_location_collection(
+        db_session, "CMIP5", collection, climate_stats=True
+    )
+    commit(db_session)
+    # Files whose data can't be read are indexed without statistics.
+    assert count == 2 * 4
+    assert db_session.query(WxFileStats).count() == 0
+
+
+def test_index_sidecars(tmpdir, db_session, make_location_collection):
+    collection = make_location_collection(2, years=(2020, 2050), data=True)
+    directory = str(tmpdir.join("sidecars"))
+    index_location_collection(
+        db_session, "CMIP5", collection, sidecar_directory=directory
+    )
+    commit(db_session)
+
+    wx_files = db_session.query(WxFile).all()
+    assert len(wx_files) == 2 * 2
+    for wx_file in wx_files:
+        data = columnar.load(wx_file.filepath, directory, create=False)
+        assert data is not None
+        assert len(data["dryBulbTemperature"]) == 8760
+
+
+def test_index_sidecars_file_changed(
+    tmpdir, db_session, make_location_collection, monkeypatch
+):
+    collection = make_location_collection(1, years=(2020,), data=True)
+    directory = str(tmpdir.join("sidecars"))
+    read_data = epw.read_data
+
+    def read_data_then_touch(filepath, names=None):
+        data = read_data(filepath, names)
+        os.utime(filepath, ns=(0, 0))
+        return data
+
+    monkeypatch.setattr(epw, "read_data", read_data_then_touch)
+    index_location_collection(
+        db_session, "CMIP5", collection, sidecar_directory=directory
+    )
+    commit(db_session)
+
+    # The sidecar of the data read is stale, not current.
+    [wx_file] = db_session.query(WxFile).all()
+    assert columnar.load(wx_file.filepath, directory, create=False) is None
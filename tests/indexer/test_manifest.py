@@ -0,0 +1,138 @@
+import logging
+import os
+
+import pytest
+from py.path import local
+
+from wxfs.database import File, Location, WxFile, ManifestEntry
+from wxfs.indexer import index_location_collection, commit
+from wxfs.indexer.manifest import compare, content_hash
+
+
+def parsed_files(caplog):
+    """Return the names of the weather files parsed, according to the log."""
+    return {
+        os.path.basename(record.getMessage().split()[-1])
+        for record in caplog.records
+        if record.getMessage().startswith("Parsing weather file")
+    }
+
+
+def touch(path, delta=10):
+    """Change the modification time of file `path`."""
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + delta))
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_incremental(
+    bulk, db_session, make_location_collection, write_location_dir, caplog
+):
+    caplog.set_level(logging.INFO, logger="wxfs.indexer")
+    path = make_location_collection(3)
+    collection = local(path)
+    assert index_location_collection(db_session, "CMIP5", path, bulk=bulk) == 12
+    commit(db_session)
+    assert db_session.query(ManifestEntry).count() == 12
+
+    # Nothing changed: nothing is parsed or indexed.
+    caplog.clear()
+    count = index_location_collection(
+        db_session, "CMIP5", path, bulk=bulk, incremental=True
+    )
+    commit(db_session)
+    assert count == 0
+    assert parsed_files(caplog) == set()
+    assert db_session.query(File).count() == 12
+
+    # Add a location, change a file in another, remove a location.
+    write_location_dir(collection, 3)
+    changed = collection.join("City1", "2050s_CAN_BC_City1.100001_CWEC2016.epw")
+    changed.write(changed.read().replace("2020-06-23", "2021-01-01"))
+    touch(changed)
+    collection.join("City0").remove()
+
+    caplog.clear()
+    index_location_collection(db_session, "CMIP5", path, bulk=bulk, incremental=True)
+    commit(db_session)
+    assert "Found 4 added, 1 changed, 4 removed, 7 unchanged files" in caplog.text
+    assert parsed_files(caplog) == {
+        "2020s_CAN_BC_City3.100003_CWEC2016.epw",
+        "2050s_CAN_BC_City3.100003_CWEC2016.epw",
+        "2080s_CAN_BC_City3.100003_CWEC2016.epw",
+        "2020s_CAN_BC_City1.100001_CWEC2016.epw",
+        "2050s_CAN_BC_City1.100001_CWEC2016.epw",
+        "2080s_CAN_BC_City1.100001_CWEC2016.epw",
+    }
+
+    assert {code for code, in db_session.query(Location.code)} == {
+        "100001",
+        "100002",
+        "100003",
+    }
+    assert db_session.query(File).count() == 12
+    changed_file = (
+        db_session.query(WxFile)
+        .filter(WxFile.filepath.endswith("2050s_CAN_BC_City1.100001_CWEC2016.epw"))
+        .one()
+    )
+    assert changed_file.creationDate.year == 2021
+    assert db_session.query(ManifestEntry).count() == 12
+    assert not any(
+        "City0" in filepath for filepath, in db_session.query(ManifestEntry.filepath)
+    )
+
+
+def test_incremental_hashes(db_session, make_location_collection, caplog):
+    caplog.set_level(logging.INFO, logger="wxfs.indexer")
+    path = make_location_collection(2)
+    index_location_collection(db_session, "CMIP5", path, hashes=True)
+    commit(db_session)
+
+    # Touched, but not changed.
+    touch(os.path.join(path, "City0", "2020s_CAN_BC_City0.100000_CWEC2016.epw"))
+    caplog.clear()
+    index_location_collection(
+        db_session, "CMIP5", path, incremental=True, hashes=True
+    )
+    commit(db_session)
+    assert "Found 0 added, 0 changed, 0 removed, 8 unchanged files" in caplog.text
+    assert parsed_files(caplog) == set()
+
+    # The manifest is brought up to date, so the file is not hashed again.
+    caplog.clear()
+    index_location_collection(
+        db_session, "CMIP5", path, incremental=True, hashes=False
+    )
+    assert parsed_files(caplog) == set()
+
+
+def test_compare(tmpdir):
+    same = tmpdir.join("same")
+    same.write("same")
+    touched = tmpdir.join("touched")
+    touched.write("touched")
+    manifest = {
+        str(same): (4, 1.0, None),
+        str(touched): (7, 1.0, content_hash(str(touched))),
+        "changed": (1, 1.0, None),
+        "removed": (1, 1.0, None),
+    }
+    stats = {
+        str(same): (4, 1.0),
+        str(touched): (7, 2.0),
+        "changed": (1, 2.0),
+        "added": (1, 1.0),
+    }
+    assert compare(manifest, stats) == (
+        {"added"},
+        {"changed", str(touched)},
+        {"removed"},
+        set(),
+    )
+    assert compare(manifest, stats, hashes=True) == (
+        {"added"},
+        {"changed"},
+        {"removed"},
+        {str(touched)},
+    )
@@ -0,0 +1,143 @@
+import os
+
+import pytest
+from py.path import local
+from sqlalchemy.orm import sessionmaker
+
+from wxfs.database import File, Location, CatalogGeneration
+from wxfs.indexer import commit
+from wxfs.indexer.watch import (
+    PollingWatcher,
+    InotifyWatcher,
+    index_location_changes,
+    inotify_simple,
+    watch,
+)
+
+
+def test_index_location_changes(db_session, make_location_collection):
+    collection = local(make_location_collection(2))
+    directory = str(collection.join("City0"))
+
+    added, changed, removed = index_location_changes(db_session, "CMIP5", directory)
+    commit(db_session)
+    assert len(added) == 4 and not changed and not removed
+    assert db_session.query(File).count() == 4
+
+    assert index_location_changes(db_session, "CMIP5", directory) == (
+        set(),
+        set(),
+        set(),
+    )
+
+    collection.join("City0", "City0_summary.xlsx").remove()
+    added, changed, removed = index_location_changes(db_session, "CMIP5", directory)
+    commit(db_session)
+    assert removed == {os.path.join(directory, "City0_summary.xlsx")}
+    assert db_session.query(File).count() == 3
+
+    collection.join("City0").remove()
+    added, changed, removed = index_location_changes(db_session, "CMIP5", directory)
+    commit(db_session)
+    assert len(removed) == 3
+    assert db_session.query(File).count() == 0
+    assert db_session.query(Location).count() == 0
+
+
+def watcher_changes(watcher, collection, write_location_dir, timeout):
+    """Make changes to `collection`, and return what `watcher` reports."""
+    results = [watcher.wait(timeout)]
+    collection.join("City0", "2100s_CAN_BC_City0.100000_CWEC2016.epw").write("x")
+    results.append(watcher.wait(timeout))
+    write_location_dir(collection, 5)
+    results.append(watcher.wait(timeout))
+    collection.join("City1").remove()
+    results.append(watcher.wait(timeout))
+    return results
+
+
+def expected_changes(collection):
+    return [
+        set(),
+        {str(collection.join("City0"))},
+        {str(collection.join("City5"))},
+        {str(collection.join("City1"))},
+    ]
+
+
+def test_polling_watcher(make_location_collection, write_location_dir):
+    collection = local(make_location_collection(2))
+    watcher = PollingWatcher(str(collection), interval=0)
+    assert watcher_changes(
+        watcher, collection, write_location_dir, 0
+    ) == expected_changes(collection)
+
+
+def test_polling_watcher_rescans_pending(make_location_collection, monkeypatch):
+    collection = local(make_location_collection(2))
+    directories = [str(collection.join(f"City{i}")) for i in range(2)]
+    watcher = PollingWatcher(str(collection), interval=3600)
+    for directory in directories:
+        local(directory).join("2100s_CAN_BC_City.100000_CWEC2016.epw").write("x")
+
+    # Before the next full scan, only the pending directory is rescanned.
+    monkeypatch.setattr(watcher, "scan", lambda: pytest.fail("full scan"))
+    assert watcher.wait(0, {directories[0]}) == {directories[0]}
+    assert watcher.wait(0, {directories[0]}) == set()
+    monkeypatch.undo()
+
+    watcher.next_scan = 0
+    assert watcher.wait(0) == {directories[1]}
+
+
+@pytest.mark.skipif(inotify_simple is None, reason="inotify_simple not installed")
+def test_inotify_watcher(make_location_collection, write_location_dir):
+    collection = local(make_location_collection(2))
+    watcher = InotifyWatcher(str(collection))
+    try:
+        assert watcher_changes(
+            watcher, collection, write_location_dir, 0.2
+        ) == expected_changes(collection)
+    finally:
+        watcher.close()
+
+
+class Stop(Exception):
+    pass
+
+
+class ScriptedWatcher:
+    """Reports scripted changes, then stops."""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+
+    def wait(self, timeout=None, pending=()):
+        if not self.changes:
+            raise Stop()
+        return self.changes.pop(0)
+
+
+def test_watch(db_engine, make_location_collection, write_location_dir):
+    collection = local(make_location_collection(0))
+    for i in range(3):
+        write_location_dir(collection, i)
+    directories = [str(collection.join(f"City{i}")) for i in range(3)]
+    watcher = ScriptedWatcher(
+        [
+            {directories[0], directories[1]},
+            set(),
+            {directories[2], "/nonexistent/City9"},
+            set(),
+        ]
+    )
+
+    with pytest.raises(Stop):
+        watch(sessionmaker(bind=db_engine), "CMIP5", watcher, debounce=0)
+
+    sesh = sessionmaker(bind=db_engine)()
+    assert sesh.query(Location).count() == 3
+    assert sesh.query(File).count() == 12
+    # One transaction, with its own catalog generation, per changed location.
+    assert sesh.query(CatalogGeneration.generation).scalar() == 3
+    sesh.close()
@@ -0,0 +1,77 @@
+import pytest
+
+from wxfs.cache import CatalogCache
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value):
+        def compute():
+            self.calls += 1
+            return value
+
+        return compute
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def generation():
+    return {"value": 1}
+
+
+@pytest.fixture()
+def clock():
+    return Clock()
+
+
+@pytest.fixture()
+def cache(generation, clock):
+    return CatalogCache(
+        lambda: generation["value"], maxsize=3, check_interval=5.0, clock=clock
+    )
+
+
+def test_hit(cache):
+    compute = Counter()
+    assert cache.get("a", compute("A")) == "A"
+    assert cache.get("a", compute("B")) == "A"
+    assert compute.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction(cache):
+    compute = Counter()
+    for key in "abc":
+        cache.get(key, compute(key))
+    cache.get("a", compute("a"))  # a is now most recently used
+    cache.get("d", compute("d"))  # evicts b
+    assert len(cache) == 3
+    assert compute.calls == 4
+    cache.get("a", compute("a"))
+    assert compute.calls == 4
+    cache.get("b", compute("b"))
+    assert compute.calls == 5
+
+
+def test_generation_change(cache, generation, clock):
+    compute = Counter()
+    cache.get("a", compute("A"))
+
+    # Change not noticed until the check interval has elapsed.
+    generation["value"] = 2
+    clock.now = 4.9
+    assert cache.get("a", compute("B")) == "A"
+
+    clock.now = 5.0
+    assert cache.get("a", compute("B")) == "B"
+    assert compute.calls == 2
+    assert cache.generation == 2
@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pytest
+
+from wxfs import columnar
+from wxfs.epw import read_data, variables
+
+
+location_line = "LOCATION,Anyville,BC,CAN,CWEC2016,999999,50.0,-124.5,-8.0,10.0"
+
+
+@pytest.fixture()
+def epw_path(tmpdir, write_epw):
+    return write_epw(tmpdir.join("a.epw"), location_line)
+
+
+@pytest.fixture()
+def directory(tmpdir):
+    return str(tmpdir.join("sidecars"))
+
+
+def test_round_trip(epw_path, directory):
+    data = columnar.load(epw_path, directory)
+    expected = read_data(epw_path)
+    assert set(data) == set(variables)
+    for name, values in expected.items():
+        np.testing.assert_allclose(data[name], values, rtol=1e-6)
+    assert data["month"].dtype == np.uint8
+    assert data["dryBulbTemperature"].dtype == np.float32
+
+
+def test_views(epw_path, directory):
+    columnar.write(epw_path, directory)
+    data = columnar.load(epw_path, directory, create=False)
+    for values in data.values():
+        # Views of the mapped sidecar, not copies of it.
+        assert not values.flags.owndata
+        assert not values.flags.writeable
+        assert values.ctypes.data % columnar.alignment == 0
+
+
+def test_load_without_create(epw_path, directory):
+    assert columnar.load(epw_path, directory, create=False) is None
+    assert not os.path.exists(columnar.sidecar_path(epw_path, directory))
+
+
+def test_stale_sidecar(tmpdir, write_epw, epw_path, directory):
+    columnar.load(epw_path, directory)
+    write_epw(epw_path, location_line, mean_temperature=20.0)
+    os.utime(epw_path, ns=(0, 0))
+    assert columnar.load(epw_path, directory, create=False) is None
+
+    data = columnar.load(epw_path, directory)
+    assert data["dryBulbTemperature"].mean() == pytest.approx(20.0, abs=0.05)
+
+
+def test_write_data_stamp(write_epw, epw_path, directory):
+    stamp = columnar.source_stamp(epw_path)
+    data = read_data(epw_path)
+    with pytest.raises(TypeError):
+        columnar.write(epw_path, directory, data)
+
+    # The file changes after it is read: the sidecar of the data read is stale.
+    write_epw(epw_path, location_line, mean_temperature=20.0)
+    os.utime(epw_path, ns=(0, 0))
+    columnar.write(epw_path, directory, data, stamp)
+    assert columnar.load(epw_path, directory, create=False) is None
+
+
+def test_invalid_sidecar(epw_path, directory):
+    path = columnar.write(epw_path, directory)
+    with open(path, "wb") as file:
+        file.write(b"garbage")
+    assert columnar.load(epw_path, directory, create=False) is None
+    assert len(columnar.load(epw_path, directory)["month"]) == 8760
+
+
+def test_write_invalid(tmpdir, directory):
+    path = tmpdir.join("a.epw")
+    path.write(location_line + "\nOTHER STUFF\n")
+    with pytest.raises(ValueError):
+        columnar.write(str(path), directory)
+    # No sidecar or temporary file is left behind.
+    assert not os.path.exists(directory) or not any(
+        files for _, _, files in os.walk(directory)
+    )
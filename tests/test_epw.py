@@ -0,0 +1,63 @@
+import statistics
+
+import pytest
+
+from wxfs.epw import climate_stats, read_data, stats_variables
+
+
+location_line = "LOCATION,Anyville,BC,CAN,CWEC2016,999999,50.0,-124.5,-8.0,10.0"
+
+
+def test_read_data(tmpdir, write_epw):
+    path = write_epw(tmpdir.join("a.epw"), location_line)
+    data = read_data(path)
+    assert all(len(values) == 8760 for values in data.values())
+    assert set(data["month"]) == set(range(1, 13))
+    assert data["hour"].min() == 1 and data["hour"].max() == 24
+    assert data["relativeHumidity"][0] == 70
+
+    data = read_data(path, ["month", "dryBulbTemperature"])
+    assert set(data) == {"month", "dryBulbTemperature"}
+
+
+def test_read_data_invalid(tmpdir):
+    path = tmpdir.join("a.epw")
+    path.write(location_line + "\nOTHER STUFF\n")
+    with pytest.raises(ValueError):
+        read_data(str(path))
+
+
+def test_climate_stats(tmpdir, write_epw):
+    path = write_epw(tmpdir.join("a.epw"), location_line, mean_temperature=5.0)
+    data = read_data(path, stats_variables)
+    stats = climate_stats(data)
+
+    temperatures = list(data["dryBulbTemperature"])
+    daily_means = [
+        statistics.mean(temperatures[day * 24 : (day + 1) * 24]) for day in range(365)
+    ]
+    assert stats["meanDryBulbTemperature"] == pytest.approx(5.0, abs=0.05)
+    assert stats["minDryBulbTemperature"] == min(temperatures)
+    assert stats["maxDryBulbTemperature"] == max(temperatures)
+    assert stats["heatingDegreeDays"] == pytest.approx(
+        sum(max(0, 18 - t) for t in daily_means)
+    )
+    assert stats["coolingDegreeDays"] == pytest.approx(
+        sum(max(0, t - 18) for t in daily_means)
+    )
+    assert (
+        stats["minDryBulbTemperature"]
+        <= stats["heatingDesignTemperature996"]
+        <= stats["heatingDesignTemperature990"]
+        < stats["coolingDesignTemperature010"]
+        <= stats["coolingDesignTemperature004"]
+        <= stats["maxDryBulbTemperature"]
+    )
+    monthly = stats["monthlyMeanDryBulbTemperature"]
+    assert len(monthly) == 12
+    assert monthly[0] == pytest.approx(
+        statistics.mean(t for t, m in zip(temperatures, data["month"]) if m == 1)
+    )
+    # Synthetic data is coldest in January, warmest in July.
+    assert monthly.index(min(monthly)) == 0
+    assert monthly.index(max(monthly)) == 6
@@ -0,0 +1,62 @@
+import pytest
+
+from wxfs.search import TextIndex, normalize, trigrams
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Montréal", "montreal"),
+        ("  ÎLE-À-LA-CROSSE ", "ile a la crosse"),
+        ("Abbotsford.Intl.AP", "abbotsford intl ap"),
+        ("Quesnel_AP", "quesnel ap"),
+    ],
+)
+def test_normalize(text, expected):
+    assert normalize(text) == expected
+
+
+def test_trigrams():
+    assert trigrams("van") == {"  v", " va", "van", "an "}
+    assert trigrams("van", open_end=True) == {"  v", " va", "van"}
+    assert trigrams("") == set()
+
+
+@pytest.fixture()
+def index():
+    return TextIndex(
+        (name, name, [code])
+        for name, code in [
+            ("Vancouver Intl AP", "1108447"),
+            ("West Vancouver", "1108824"),
+            ("Vanderhoof", "1098D90"),
+            ("Victoria Intl AP", "1018621"),
+            ("Montréal-Trudeau", "7025250"),
+            ("Mont-Joli", "7055120"),
+            ("Savanna", "9999999"),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("v", ["Vanderhoof", "Victoria Intl AP", "Vancouver Intl AP", "West Vancouver"]),
+        ("van", ["Vanderhoof", "Vancouver Intl AP", "West Vancouver"]),
+        ("vancouver", ["Vancouver Intl AP", "West Vancouver"]),
+        ("MONTREAL", ["Montréal-Trudeau"]),
+        ("montréal tr", ["Montréal-Trudeau"]),
+        ("mont", ["Mont-Joli", "Montréal-Trudeau"]),
+        ("vancuover", ["West Vancouver", "Vancouver Intl AP"]),  # typo
+        ("110", ["West Vancouver", "Vancouver Intl AP"]),  # code prefix
+        ("xyz", []),
+        ("", []),
+        ("  -- ", []),
+    ],
+)
+def test_search(query, expected, index):
+    assert index.search(query) == expected
+
+
+def test_search_limit(index):
+    assert len(index.search("v", limit=2)) == 2
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from wxfs.spatial import SpatialIndex, ClusterGrid, haversine_km
+
+
+@pytest.fixture()
+def points():
+    rng = random.Random(42)
+    return [
+        (rng.uniform(-90, 90), rng.uniform(-180, 180), i) for i in range(2000)
+    ]
+
+
+def brute_force(points, latitude, longitude, k):
+    return sorted(
+        (haversine_km(latitude, longitude, lat, lon), item)
+        for lat, lon, item in points
+    )[:k]
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude",
+    [(49.3, -123.1), (89.9, 0.0), (-90.0, 45.0), (0.0, 179.99), (10.0, -179.99)],
+)
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_nearest(latitude, longitude, k, points):
+    index = SpatialIndex(points)
+    result = index.nearest(latitude, longitude, k)
+    expected = brute_force(points, latitude, longitude, k)
+    assert [item for _, item in result] == [item for _, item in expected]
+    for (distance, _), (expected_distance, _) in zip(result, expected):
+        assert distance == pytest.approx(expected_distance, abs=1e-6)
+
+
+def test_k_exceeds_size():
+    index = SpatialIndex([(0, 0, "a"), (0, 1, "b")])
+    assert [item for _, item in index.nearest(0, 0.9, k=10)] == ["b", "a"]
+
+
+def test_empty():
+    assert SpatialIndex([]).nearest(0, 0, k=3) == []
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ((0, 0), (0, 180), 20015.1),
+        ((49.2827, -123.1207), (48.4284, -123.3656), 96.7),  # Vancouver-Victoria
+    ],
+)
+def test_haversine(a, b, expected):
+    assert haversine_km(*a, *b) == pytest.approx(expected, abs=0.5)
+
+
+@pytest.fixture()
+def grid(points):
+    return ClusterGrid(
+        (latitude, longitude, {"id": item}) for latitude, longitude, item in points
+    )
+
+
+def ids(features):
+    return {feature["properties"]["id"] for feature in features}
+
+
+@pytest.mark.parametrize(
+    "bbox",
+    [None, (-130, 45, -110, 60), (170, -10, -170, 10), (-1, -1, 1, 1)],
+)
+def test_grid_points_in_bbox(bbox, points, grid):
+    west, south, east, north = bbox or (-180, -90, 180, 90)
+
+    def in_bbox(latitude, longitude):
+        in_lon = (
+            west <= longitude <= east
+            if west <= east
+            else longitude >= west or longitude <= east
+        )
+        return in_lon and south <= latitude <= north
+
+    expected = {item for latitude, longitude, item in points if in_bbox(latitude, longitude)}
+    assert ids(grid.features(bbox=bbox)) == expected
+    assert ids(grid.features(bbox=bbox, zoom=15)) == expected
+
+
+@pytest.mark.parametrize("zoom", [0, 2, 5, 9])
+def test_grid_clusters(zoom, points, grid):
+    features = grid.features(zoom=zoom)
+    total = sum(
+        feature["properties"].get("point_count", 1) for feature in features
+    )
+    assert total == len(points)
+    # Coarser zoom, fewer (bigger) clusters.
+    if zoom > 0:
+        assert len(features) >= len(grid.features(zoom=zoom - 1))
+    assert len(grid.features(zoom=0)) <= 4 * 2 * 4
+
+
+def test_grid_cluster_centroid():
+    grid = ClusterGrid([(10.0, 10.0, {"id": 1}), (10.2, 10.4, {"id": 2})])
+    [feature] = grid.features(zoom=3)
+    assert feature["properties"] == {"cluster": True, "point_count": 2}
+    assert feature["geometry"]["coordinates"] == pytest.approx([10.2, 10.1])
+    assert ids(grid.features(zoom=12)) == {1, 2}
+
+
+def test_grid_clusters_across_antimeridian():
+    grid = ClusterGrid([(49.0, 20.0, {"id": 1}), (50.0, 25.0, {"id": 2})])
+    # At zoom 0, the cluster's cell spans both halves of the box.
+    [feature] = grid.features((45, -10, 30, 80), zoom=0)
+    assert feature["properties"] == {"cluster": True, "point_count": 2}
+    assert grid.features((45, -10, 30, 80), zoom=0) == grid.features(zoom=0)
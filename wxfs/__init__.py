@@ -1,7 +1,14 @@
+import contextlib
 import os
+import tempfile
 import connexion
+from connexion.middleware import MiddlewarePosition
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.middleware.cors import CORSMiddleware
+from wxfs.cache import CatalogCache, catalog_generation
 
 # This is a nasty way to do this.
 #
@@ -18,24 +25,99 @@ from flask_sqlalchemy import SQLAlchemy
 connexion_app = None
 flask_app = None
 app_db = None
+app_cache = None
+app_async_engine = None
+app_async_sessionmaker = None
+
+content_offload_modes = {"", "x-accel-redirect", "x-sendfile"}
+
+
+def parse_prefix_map(text):
+    """Parse a prefix mapping of the form "<from>=<to>,<from>=<to>,..." into a
+    list of (from, to) pairs."""
+    items = (item.strip() for item in text.split(","))
+    return [tuple(item.split("=", 1)) for item in items if item]
+
+
+def parse_flag(text):
+    """Parse a boolean configuration value."""
+    return text.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def async_database_uri(uri):
+    """Return database URI `uri` with its driver replaced by asyncpg."""
+    return make_url(uri).set(drivername="postgresql+asyncpg")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    if app_async_engine is not None:
+        await app_async_engine.dispose()
 
 
 def create_app(config_override={}):
-    global connexion_app, flask_app, app_db
-    connexion_app = connexion.FlaskApp(__name__, specification_dir="openapi/")
+    global connexion_app, flask_app, app_db, app_cache
+    global app_async_engine, app_async_sessionmaker
+    connexion_app = connexion.FlaskApp(
+        __name__, specification_dir="openapi/", lifespan=lifespan
+    )
 
     flask_app = connexion_app.app
-    CORS(flask_app)
 
     flask_app.config.from_mapping(
         SQLALCHEMY_DATABASE_URI=os.getenv("WXFS_DSN", ""),
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SQLALCHEMY_ECHO=False,
+        WXFS_CACHE_SIZE=int(os.getenv("WXFS_CACHE_SIZE", "1024")),
+        WXFS_CACHE_CHECK_INTERVAL=float(os.getenv("WXFS_CACHE_CHECK_INTERVAL", "5")),
+        WXFS_CACHE_CONTROL=os.getenv("WXFS_CACHE_CONTROL", "public, no-cache"),
+        WXFS_CONTENT_OFFLOAD=os.getenv("WXFS_CONTENT_OFFLOAD", "").lower(),
+        WXFS_CONTENT_OFFLOAD_PREFIXES=parse_prefix_map(
+            os.getenv("WXFS_CONTENT_OFFLOAD_PREFIXES", "")
+        ),
+        WXFS_ASYNC=parse_flag(os.getenv("WXFS_ASYNC", "")),
+        WXFS_SIDECAR_DIRECTORY=os.getenv(
+            "WXFS_SIDECAR_DIRECTORY",
+            os.path.join(tempfile.gettempdir(), "wxfs-sidecars"),
+        ),
     )
     flask_app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_pre_ping": True}
     flask_app.config.update(config_override)
+    if flask_app.config["WXFS_CONTENT_OFFLOAD"] not in content_offload_modes:
+        raise ValueError(
+            f"Invalid WXFS_CONTENT_OFFLOAD: "
+            f"'{flask_app.config['WXFS_CONTENT_OFFLOAD']}'"
+        )
 
     app_db = SQLAlchemy(flask_app)
+    app_async_engine = app_async_sessionmaker = None
+    if flask_app.config["WXFS_ASYNC"]:
+        # Imported here because it imports this module.
+        from wxfs.api.asynchronous import AsyncContentMiddleware
+
+        app_async_engine = create_async_engine(
+            async_database_uri(flask_app.config["SQLALCHEMY_DATABASE_URI"]),
+            pool_pre_ping=True,
+        )
+        app_async_sessionmaker = async_sessionmaker(app_async_engine)
+        if not flask_app.config["WXFS_CONTENT_OFFLOAD"]:
+            connexion_app.add_middleware(AsyncContentMiddleware)
+        # Responses sent by the middleware bypass Flask, and so Flask-CORS.
+        connexion_app.add_middleware(
+            CORSMiddleware,
+            position=MiddlewarePosition.BEFORE_EXCEPTION,
+            allow_origins=["*"],
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    else:
+        CORS(flask_app)
+    app_cache = CatalogCache(
+        lambda: catalog_generation(get_app_session()),
+        maxsize=flask_app.config["WXFS_CACHE_SIZE"],
+        check_interval=flask_app.config["WXFS_CACHE_CHECK_INTERVAL"],
+    )
 
     # Must establish database before adding API spec(s). API specs refer to
     # handlers (`operationId`), which in turn import the database.
@@ -55,3 +137,13 @@ def get_app_db():
 
 def get_app_session():
     return app_db.session
+
+
+def get_app_cache():
+    return app_cache
+
+
+def get_app_async_session():
+    """Return a new asynchronous database session (asynchronous variant only;
+    see `create_app`)."""
+    return app_async_sessionmaker()
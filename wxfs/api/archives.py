@@ -0,0 +1,86 @@
+"""Streaming ZIP archives.
+
+Archives are built on the fly as they are sent: there is no temporary file, and
+no more than about one chunk of file content is held in memory at a time. The
+ZIP format permits this: when the output is not seekable, `zipfile` writes each
+member's sizes and CRC in a data descriptor following its content rather than
+in its (already sent) local header.
+
+Once the response has started, an error can only truncate the archive, so
+members are checked before it starts (see `existing_members`).
+"""
+
+import logging
+import os
+import zipfile
+
+
+logger = logging.getLogger(__name__)
+
+
+chunk_size = 64 * 1024
+
+# Files in these formats are already compressed; compressing them again only
+# costs CPU time.
+stored_extensions = {".xlsx", ".zip", ".gz"}
+
+
+class Sink:
+    """Write-only, unseekable file-like object that accumulates what is written
+    to it until it is taken."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def existing_members(members):
+    """Return the members whose files exist, logging those that don't.
+
+    :param members: Iterable of (filepath, name in archive) pairs.
+    :return: list of (filepath, name in archive) pairs.
+    """
+    result = []
+    for filepath, arcname in members:
+        if os.path.isfile(filepath):
+            result.append((filepath, arcname))
+        else:
+            logger.warning(f"Omitting missing file {filepath} from archive")
+    return result
+
+
+def zip_stream(members):
+    """Generate the content of a ZIP archive, in chunks.
+
+    :param members: Iterable of (filepath, name in archive) pairs.
+    :return: Generator of bytes.
+    """
+    sink = Sink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for filepath, arcname in members:
+            info = zipfile.ZipInfo.from_file(filepath, arcname)
+            _, extension = os.path.splitext(filepath)
+            info.compress_type = (
+                zipfile.ZIP_STORED
+                if extension.lower() in stored_extensions
+                else zipfile.ZIP_DEFLATED
+            )
+            with open(filepath, "rb") as src, archive.open(info, "w") as dest:
+                while chunk := src.read(chunk_size):
+                    dest.write(chunk)
+                    data = sink.take()
+                    if data:
+                        yield data
+            yield sink.take()
+    yield sink.take()
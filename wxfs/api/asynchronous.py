@@ -0,0 +1,99 @@
+"""Serving file content asynchronously.
+
+The API handlers are synchronous Flask views, which the ASGI server runs in a
+pool of worker threads. A file download occupies one of those threads for as
+long as the client takes to receive the file, so a handful of slow downloads
+can leave no thread for other requests.
+
+In the asynchronous variant of the app (`WXFS_ASYNC`; see `wxfs.create_app`),
+`AsyncContentMiddleware` serves file content (`/files/{id}/content`) itself,
+on the event loop: it looks up the file with an asynchronous database session
+and streams it without blocking (reads are handed to a thread a chunk at a
+time), so a worker process can serve many downloads at once while its threads
+serve everything else. The middleware sits at the end of Connexion's middleware
+stack, so requests reach it already routed and validated; it passes requests
+for other operations on to the Flask app.
+
+Responses are as from the synchronous handler: conditional (`ETag`,
+`Last-Modified`, 304 Not Modified) and partial (`Range`, 206 Partial Content).
+"""
+
+import mimetypes
+import os
+
+import anyio
+from connexion.exceptions import ProblemException
+from sqlalchemy import select
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from werkzeug.http import parse_date, parse_etags
+
+from wxfs import get_app_async_session
+from wxfs.database import File
+
+
+content_operation_id = "wxfs.api.files.getContent"
+
+
+async def get_filepath_by_id(id):
+    """Return the filepath of file `id`, looked up asynchronously."""
+    async with get_app_async_session() as sesh:
+        filepath = await sesh.scalar(select(File.filepath).where(File.id == id))
+    if filepath is None:
+        raise ProblemException(status=404, title="Not Found", detail=f"No file {id}")
+    return filepath
+
+
+def not_modified(request_headers, response_headers, stat_result):
+    """Return whether a conditional request (`If-None-Match`, or failing that,
+    `If-Modified-Since`) is satisfied by the client's copy of a file."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = response_headers["etag"].strip('"')
+        return parse_etags(if_none_match).contains_weak(etag)
+    if_modified_since = parse_date(request_headers.get("if-modified-since"))
+    return (
+        if_modified_since is not None
+        and int(stat_result.st_mtime) <= if_modified_since.timestamp()
+    )
+
+
+async def content_response(id, request_headers):
+    """Return a response sending the content of file `id`."""
+    filepath = await get_filepath_by_id(id)
+    try:
+        stat_result = await anyio.Path(filepath).stat()
+    except FileNotFoundError:
+        raise ProblemException(
+            status=404, title="Not Found", detail=f"No content for file {id}"
+        )
+    response = FileResponse(
+        filepath,
+        stat_result=stat_result,
+        filename=os.path.basename(filepath),
+        media_type=mimetypes.guess_type(filepath)[0] or "application/octet-stream",
+    )
+    if not_modified(request_headers, response.headers, stat_result):
+        headers = {name: response.headers[name] for name in ("etag", "last-modified")}
+        return Response(status_code=304, headers=headers)
+    return response
+
+
+class AsyncContentMiddleware:
+    """ASGI middleware serving file content asynchronously (see module
+    docstring), and passing other requests on to `app`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        routing = scope.get("extensions", {}).get("connexion_routing", {})
+        if scope["type"] != "http" or routing.get("operation_id") != (
+            content_operation_id
+        ):
+            await self.app(scope, receive, send)
+            return
+        response = await content_response(
+            int(scope["path_params"]["id"]), Headers(scope=scope)
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,31 @@
+"""Caching of API handler results. See `wxfs.cache` for the cache itself."""
+
+import functools
+
+from wxfs import get_app_cache
+
+
+def freeze(value):
+    """Return a hashable equivalent of a handler argument value."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+
+def cached(handler):
+    """Decorate an API handler so that its results are cached in the app cache,
+    keyed by handler and arguments. Exceptions are not cached.
+
+    Connexion looks through the decorator (`__wrapped__`) to find out which
+    parameters to pass to the handler.
+    """
+    name = f"{handler.__module__}.{handler.__qualname__}"
+
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        key = (name, freeze(args), freeze(kwargs))
+        return get_app_cache().get(key, lambda: handler(*args, **kwargs))
+
+    return wrapper
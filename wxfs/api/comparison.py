@@ -0,0 +1,114 @@
+"""Comparisons of the hourly data of two weather files.
+
+A comparison answers "how does the weather of one period differ from that of
+another", typically for the same location and scenario: e.g., the 2050s file
+against the 2020s file. For each variable compared, it gives the mean, minimum
+and maximum of each file and the differences between them (later minus
+earlier), and the differences either of monthly means or of every hour.
+
+Hours are matched by month, day and hour, so files need not cover exactly the
+same hours (e.g., if one covers a leap year); hours in only one file are left
+out. Computation is vectorized with NumPy over the files' sidecars (see
+`wxfs.api.hourly`), and comparisons are cached per pair of files (see
+`file_comparison`), so a repeated comparison costs a lookup.
+"""
+
+import numpy as np
+from connexion.exceptions import ProblemException
+from flask import url_for
+
+from wxfs.api.caching import cached
+from wxfs.api.hourly import column_values, decimals, hour_keys, load_data
+from wxfs.api.payloads import Payload
+
+
+def rounded(value):
+    """Return a value as a float rounded like hourly data values."""
+    return round(float(value), decimals)
+
+
+def summary(values):
+    """Return the mean, minimum and maximum of an array of values."""
+    return {
+        "mean": rounded(values.mean()),
+        "min": rounded(values.min()),
+        "max": rounded(values.max()),
+    }
+
+
+def monthly_means(values, month):
+    """Return an array of the means of `values` by month (1 to 12), NaN where a
+    month has no values."""
+    totals = np.bincount(month, weights=values, minlength=13)[1:]
+    counts = np.bincount(month, minlength=13)[1:]
+    return np.divide(totals, counts, out=np.full(12, np.nan), where=counts > 0)
+
+
+def compare_data(earlier, later, names, resolution="monthly"):
+    """Compare hourly data `later` with hourly data `earlier` (as returned by
+    `wxfs.columnar.load`).
+
+    :param names: Names of the variables to compare.
+    :param resolution: "monthly" for differences of monthly means, "hourly" for
+        differences of every hour.
+    :return: dict with, for each variable, its summaries (`summary`) in each
+        file and their differences, and its monthly or hourly differences; and,
+        if hourly, the hours compared.
+    :raises ProblemException: (422) if the files have no hours in common.
+    """
+    _, earlier_rows, later_rows = np.intersect1d(
+        hour_keys(earlier), hour_keys(later), return_indices=True
+    )
+    if len(earlier_rows) == 0:
+        raise ProblemException(
+            status=422,
+            title="Unprocessable Entity",
+            detail="The files have no hours in common",
+        )
+    month = earlier["month"][earlier_rows].astype(np.intp)
+
+    variables = {}
+    for name in names:
+        before = earlier[name][earlier_rows].astype(np.float64)
+        after = later[name][later_rows].astype(np.float64)
+        summaries = {"from": summary(before), "to": summary(after)}
+        summaries["delta"] = {
+            statistic: rounded(summaries["to"][statistic] - value)
+            for statistic, value in summaries["from"].items()
+        }
+        if resolution == "hourly":
+            summaries["hourlyDelta"] = column_values(after - before)
+        else:
+            delta = monthly_means(after, month) - monthly_means(before, month)
+            summaries["monthlyDelta"] = [
+                None if np.isnan(value) else rounded(value) for value in delta
+            ]
+        variables[name] = summaries
+
+    result = {"hours": len(earlier_rows), "variables": variables}
+    if resolution == "hourly":
+        result["time"] = {
+            name: column_values(earlier[name][earlier_rows])
+            for name in ("month", "day", "hour")
+        }
+    return result
+
+
+@cached
+def file_comparison(earlier, later, names, resolution):
+    """Return the comparison of two weather files, as a `Payload`.
+
+    :param earlier: tuple (id, filepath) of the earlier file.
+    :param later: tuple (id, filepath) of the later file.
+    :param names: tuple of names of the variables to compare.
+    :param resolution: See `compare_data`.
+    """
+    comparison = compare_data(load_data(*earlier), load_data(*later), names, resolution)
+    return Payload(
+        {
+            "fromFileUri": url_for(".wxfs_api_files_get", id=earlier[0]),
+            "toFileUri": url_for(".wxfs_api_files_get", id=later[0]),
+            "resolution": resolution,
+            **comparison,
+        }
+    )
@@ -1,83 +1,461 @@
-from flask import url_for, send_file
-from wxfs.database import File
+import os
+from operator import itemgetter
+from urllib.parse import quote
+
+from connexion.exceptions import BadRequestProblem, ProblemException
+from dateutil.parser import isoparse
+from flask import current_app, send_file, url_for
+from sqlalchemy.orm import with_polymorphic
+from wxfs.database import File, WxFile, WxFileStats
 from wxfs import get_app_session
+from wxfs.api.caching import cached
+from wxfs.api.hourly import data_response
+from wxfs.api.pagination import paginate, next_link
+from wxfs.api.payloads import Payload, serve_payload
+from wxfs.api.serialization import compile_rep, uri_template
+from wxfs.api.streaming import json_array_response
+
+
+# Representations of files are built from rows of column values rather than
+# from ORM objects, which are much slower to load. These are the columns, in
+# row order: first those of all files, then those of weather files, then (only
+# if requested) the climate statistics of weather files.
+
+base_columns = ("id", "fileType", "filepath", "scenario", "version", "location_id")
+subtype_columns = (
+    "creationDate",
+    "dataSource",
+    "designDataType",
+    "timePeriodStart",
+    "timePeriodEnd",
+    "ensembleStatistic",
+    "variables",
+    "anomaly",
+    "smoothing",
+)
+stats_columns = (
+    "meanDryBulbTemperature",
+    "minDryBulbTemperature",
+    "maxDryBulbTemperature",
+    "heatingDegreeDays",
+    "coolingDegreeDays",
+    "heatingDesignTemperature996",
+    "heatingDesignTemperature990",
+    "coolingDesignTemperature010",
+    "coolingDesignTemperature004",
+    "monthlyMeanDryBulbTemperature",
+)
+column_index = {
+    name: index
+    for index, name in enumerate(base_columns + subtype_columns + stats_columns)
+}
 
 
-def selfUri(file):
-    return url_for(".wxfs_api_files_get", id=file.id)
+def column(name):
+    """Return a function getting column `name` from a file row."""
+    return itemgetter(column_index[name])
 
 
-def contentUri(file):
-    return url_for(".wxfs_api_files_getContent", id=file.id)
+def file_rows(subtypes=True, stats=False):
+    """Return a query for files as rows of column values (see `base_columns`,
+    `subtype_columns`, `stats_columns`).
+
+    By default rows include the columns of weather files (null for other file
+    types). If no subtype-specific attributes are needed, pass
+    `subtypes=False` to query only the base table. Pass `stats=True` to
+    include climate statistics (null for files without them) as well.
+    """
+    if subtypes or stats:
+        entity = with_polymorphic(File, [WxFile])
+        columns = [getattr(entity, name) for name in base_columns] + [
+            getattr(entity.WxFile, name) for name in subtype_columns
+        ]
+    else:
+        columns = [getattr(File, name) for name in base_columns]
+    if not stats:
+        return get_app_session().query(*columns)
+    columns += [getattr(WxFileStats, name) for name in stats_columns]
+    return (
+        get_app_session()
+        .query(*columns)
+        .outerjoin(WxFileStats, WxFileStats.id == entity.id)
+    )
+
 
+def stats_rep(values):
+    """Return representation of the climate statistics of a file, from the
+    values of `stats_columns`, or None if they are null."""
+    if values[0] is None:
+        return None
+    return dict(zip(stats_columns, values))
 
-def single_item_rep(file):
-    """Return representation of a single file item."""
-    rep_common = {
-        "id": file.id,
-        "selfUri": selfUri(file),
-        "fileType": file.fileType,
-        "filepath": file.filepath,
-        "contentUri": contentUri(file),
+
+def item_getters(self_uri, content_uri):
+    """Return, for each file type, a dict mapping each field of the
+    representation of a file to a function computing its value from a file
+    row.
+
+    Getters for subtype columns may be included even if rows lack them; they
+    must then not be called.
+
+    :param self_uri: Function returning the URI of a file from its id.
+    :param content_uri: Function returning the content URI of a file from its
+        id.
+    """
+    id_index = column_index["id"]
+    start, end = column("timePeriodStart"), column("timePeriodEnd")
+    stats_start = column_index[stats_columns[0]]
+    stats_end = stats_start + len(stats_columns)
+    common = {
+        "id": column("id"),
+        "selfUri": lambda row: self_uri(row[id_index]),
+        "fileType": column("fileType"),
+        "filepath": column("filepath"),
+        "contentUri": lambda row: content_uri(row[id_index]),
     }
-    if file.fileType == "weather":
-        return {
-            **rep_common,
-            "creationDate": file.creationDate,
-            "dataSource": file.dataSource,
-            "designDataType": file.designDataType,
-            "scenario": file.scenario,
-            "timePeriod": {
-                "start": file.timePeriodStart,
-                "end": file.timePeriodEnd,
-            },
-            "ensembleStatistic": file.ensembleStatistic,
-            "variables": file.variables,
-            "anomaly": file.anomaly,
-            "smoothing": file.smoothing,
-            "version": file.version,
-        }
-    elif file.fileType == "summary":
-        return {
-            **rep_common,
+    return {
+        "weather": {
+            **common,
+            "creationDate": column("creationDate"),
+            "dataSource": column("dataSource"),
+            "designDataType": column("designDataType"),
+            "scenario": column("scenario"),
+            "timePeriod": lambda row: {"start": start(row), "end": end(row)},
+            "ensembleStatistic": column("ensembleStatistic"),
+            "variables": column("variables"),
+            "anomaly": column("anomaly"),
+            "smoothing": column("smoothing"),
+            "version": column("version"),
+            "stats": lambda row: stats_rep(row[stats_start:stats_end]),
+        },
+        "summary": {
+            **common,
             # TODO: It is probably not right to fill these in statically.
             #  See TODO in ORM definition
-            "scenario": file.scenario,
-            "version": file.version,
-            "ensembleStatistic": "multiple",
-            "timePeriod": "all",
-            "variables": "all thermodynamic",
-        }
-    else:
-        raise ValueError(f"Invalid file type: {file.fileType}")
+            "scenario": column("scenario"),
+            "version": column("version"),
+            "ensembleStatistic": lambda row: "multiple",
+            "timePeriod": lambda row: "all",
+            "variables": lambda row: "all thermodynamic",
+        },
+    }
+
 
+# Fields whose values come from subtype (`WxFile`) columns.
+subtype_fields = {
+    "creationDate",
+    "dataSource",
+    "designDataType",
+    "timePeriod",
+    "ensembleStatistic",
+    "variables",
+    "anomaly",
+    "smoothing",
+}
+# Fields included only if requested by name.
+optional_fields = {"stats"}
 
-def collection_item_rep(file):
-    """Return representation of a file collection item.
-    May conceivably be different than representation of a single a file.
+
+def row_serializer(fields=None):
+    """Return a function computing the representation of a file from a file
+    row (see `file_rows`).
+
+    URIs are resolved and the representation of each file type is compiled
+    (see `wxfs.api.serialization`) once, here, so the function should be
+    reused for all the files of a request.
+
+    :param fields: Names of the fields to include; None for all but
+        `optional_fields`.
     """
-    return single_item_rep(file)
+    getters = item_getters(
+        uri_template(".wxfs_api_files_get"),
+        uri_template(".wxfs_api_files_getContent"),
+    )
+    reps = {
+        file_type: compile_rep(
+            type_getters,
+            set(type_getters) - optional_fields if fields is None else fields,
+        )
+        for file_type, type_getters in getters.items()
+    }
+    file_type = column("fileType")
 
+    def serialize(row):
+        try:
+            rep = reps[file_type(row)]
+        except KeyError:
+            raise ValueError(f"Invalid file type: {file_type(row)}")
+        return rep(row)
 
-def collection_rep(files):
-    """Return representation of files collection."""
-    return [collection_item_rep(file) for file in files]
+    return serialize
+
+
+def single_item_rep(row, fields=None):
+    """Return representation of a single file item, from a file row.
+
+    :param fields: Names of the fields to include; None for all.
+    """
+    return row_serializer(fields)(row)
 
 
-def listing():
-    files = get_app_session().query(File).order_by(File.id.asc()).all()
-    return collection_rep(files)
+def collection_rep(rows, fields=None):
+    """Return representation of files collection, from file rows."""
+    serialize = row_serializer(fields)
+    return [serialize(row) for row in rows]
 
 
-def get_file_by_id(id):
-    return get_app_session().query(File).filter_by(id=id).one()
+def parse_datetime(name, value):
+    """Parse an ISO 8601 date or date-time query parameter."""
+    try:
+        return isoparse(value)
+    except ValueError:
+        raise BadRequestProblem(
+            detail=f"Parameter '{name}' is not an ISO 8601 date or date-time"
+        )
 
 
+def filter_files(
+    query,
+    scenario=None,
+    version=None,
+    designDataType=None,
+    ensembleStatistic=None,
+    location_id=None,
+    timePeriodStart=None,
+    timePeriodEnd=None,
+):
+    """Apply selection criteria to a file query. Criteria left as None do not
+    apply.
+
+    Criteria on weather file attributes (`designDataType`, `ensembleStatistic`,
+    time period) exclude summary files, which lack those attributes.
+    A file is selected by time period if its time period overlaps the
+    period from `timePeriodStart` to `timePeriodEnd`; either end may be left
+    open.
+    """
+    for column, value in (
+        (File.scenario, scenario),
+        (File.version, version),
+        (File.location_id, location_id),
+        (WxFile.designDataType, designDataType),
+        (WxFile.ensembleStatistic, ensembleStatistic),
+    ):
+        if value is not None:
+            query = query.filter(column == value)
+    if timePeriodStart is not None:
+        start = parse_datetime("timePeriodStart", timePeriodStart)
+        query = query.filter(WxFile.timePeriodEnd >= start)
+    if timePeriodEnd is not None:
+        end = parse_datetime("timePeriodEnd", timePeriodEnd)
+        query = query.filter(WxFile.timePeriodStart <= end)
+    return query
+
+
+def listing_query(
+    fields=None,
+    scenario=None,
+    version=None,
+    designDataType=None,
+    ensembleStatistic=None,
+    location_id=None,
+    timePeriodStart=None,
+    timePeriodEnd=None,
+):
+    """Return a query for the files selected by criteria (see `filter_files`).
+
+    If `fields` is given, subtype tables are queried only if those fields or
+    the criteria need them, and climate statistics only if requested.
+    """
+    stats = fields is not None and "stats" in fields
+    subtypes = (
+        fields is None
+        or not subtype_fields.isdisjoint(fields)
+        or any(
+            criterion is not None
+            for criterion in (
+                designDataType,
+                ensembleStatistic,
+                timePeriodStart,
+                timePeriodEnd,
+            )
+        )
+    )
+    return filter_files(
+        file_rows(subtypes, stats),
+        scenario=scenario,
+        version=version,
+        designDataType=designDataType,
+        ensembleStatistic=ensembleStatistic,
+        location_id=location_id,
+        timePeriodStart=timePeriodStart,
+        timePeriodEnd=timePeriodEnd,
+    )
+
+
+def listing(
+    fields=None,
+    stream=False,
+    limit=None,
+    after=None,
+    scenario=None,
+    version=None,
+    designDataType=None,
+    ensembleStatistic=None,
+    location_id=None,
+    timePeriodStart=None,
+    timePeriodEnd=None,
+):
+    """Return a list of files, optionally selected by criteria (see
+    `filter_files`) and paged (see `wxfs.api.pagination`). Selection is done
+    in the database, supported by indexes.
+
+    If `fields` is given, only those fields of each file are returned.
+
+    If `stream` is true, the list is streamed as it is read from the database
+    (see `wxfs.api.streaming`) instead of being built, cached and sent whole.
+    Streaming is for reading whole collections, so it excludes paging.
+    """
+    criteria = dict(
+        scenario=scenario,
+        version=version,
+        designDataType=designDataType,
+        ensembleStatistic=ensembleStatistic,
+        location_id=location_id,
+        timePeriodStart=timePeriodStart,
+        timePeriodEnd=timePeriodEnd,
+    )
+    if stream:
+        if limit is not None or after is not None:
+            raise BadRequestProblem(
+                detail="Parameter 'stream' cannot be combined with paging"
+            )
+        query = listing_query(fields, **criteria).order_by(File.id)
+        return json_array_response(query, row_serializer(fields))
+    return paged_listing(fields=fields, limit=limit, after=after, **criteria)
+
+
+@serve_payload
+@cached
+def paged_listing(fields=None, limit=None, after=None, **criteria):
+    """Return a page of the file listing, as a cached `Payload`."""
+    files, next_after = paginate(
+        listing_query(fields, **criteria), File.id, limit=limit, after=after
+    )
+    return Payload(
+        collection_rep(files, fields), headers=next_link(next_after, limit)
+    )
+
+
+@cached
 def get(id):
-    file = get_file_by_id(id)
-    return single_item_rep(file)
+    row = file_rows().filter(File.id == id).one()
+    return single_item_rep(row)
+
+
+@cached
+def getStats(id):
+    """Return the climate statistics of a weather file, computed from its
+    hourly data when it was indexed."""
+    query = (
+        get_app_session()
+        .query(*(getattr(WxFileStats, name) for name in stats_columns))
+        .filter(WxFileStats.id == id)
+    )
+    row = query.one_or_none()
+    if row is None:
+        raise ProblemException(
+            status=404,
+            title="Not Found",
+            detail=f"No climate statistics for file {id}",
+        )
+    return {"fileUri": url_for(".wxfs_api_files_get", id=id), **stats_rep(row)}
+
+
+@cached
+def get_wx_filepath_by_id(id):
+    query = get_app_session().query(WxFile.filepath).filter(WxFile.id == id)
+    row = query.one_or_none()
+    if row is None:
+        raise ProblemException(
+            status=404, title="Not Found", detail=f"No weather file {id}"
+        )
+    return row.filepath
+
+
+def getData(id, variables=None, start=None, end=None, format="json"):
+    """Return a slice of the hourly data of a weather file, selected by
+    variable and time window, streamed as JSON or CSV. See `wxfs.api.hourly`.
+    """
+    return data_response(
+        id,
+        get_wx_filepath_by_id(id),
+        variables=variables,
+        start=start,
+        end=end,
+        format=format,
+    )
+
+
+@cached
+def get_filepath_by_id(id):
+    query = get_app_session().query(File.filepath).filter(File.id == id)
+    row = query.one_or_none()
+    if row is None:
+        raise ProblemException(status=404, title="Not Found", detail=f"No file {id}")
+    return row.filepath
+
+
+def offload_path(filepath):
+    """Return the path by which the front proxy knows file `filepath`, according
+    to the first matching prefix mapping in `WXFS_CONTENT_OFFLOAD_PREFIXES`."""
+    for local_prefix, proxy_prefix in current_app.config[
+        "WXFS_CONTENT_OFFLOAD_PREFIXES"
+    ]:
+        if filepath.startswith(local_prefix):
+            return proxy_prefix + filepath[len(local_prefix) :]
+    return filepath
+
+
+def offloaded_content(filepath):
+    """Return a response that delegates sending the content of file `filepath`
+    to the front proxy, according to `WXFS_CONTENT_OFFLOAD`:
+
+    - "x-accel-redirect" (nginx): header is an internal URI for the file.
+    - "x-sendfile" (Apache mod_xsendfile, lighttpd): header is a file path.
+
+    The proxy then also handles range and conditional requests.
+    """
+    mode = current_app.config["WXFS_CONTENT_OFFLOAD"]
+    path = offload_path(filepath)
+    response = current_app.response_class(mimetype="application/octet-stream")
+    if mode == "x-accel-redirect":
+        response.headers["X-Accel-Redirect"] = quote(path)
+    else:
+        response.headers["X-Sendfile"] = path
+    response.headers.set(
+        "Content-Disposition", "attachment", filename=os.path.basename(filepath)
+    )
+    return response
 
 
 def getContent(id):
-    file = get_file_by_id(id)
-    return send_file(file.filepath, as_attachment=True)
+    """Return the content of a file.
+
+    If `WXFS_CONTENT_OFFLOAD` is configured, the content is sent by the front
+    proxy; see `offloaded_content`. Otherwise it is sent from here.
+
+    Responses are conditional: they carry `ETag` (derived from file modification
+    time and size) and `Last-Modified` headers, a request with a matching
+    `If-None-Match` or `If-Modified-Since` is answered with 304 Not Modified,
+    and a `Range` request is answered with 206 Partial Content, so that
+    interrupted downloads can be resumed.
+    """
+    filepath = get_filepath_by_id(id)
+    if current_app.config["WXFS_CONTENT_OFFLOAD"]:
+        return offloaded_content(filepath)
+
+    response = send_file(filepath, as_attachment=True, conditional=True, etag=True)
+    # Werkzeug advertises range support only on partial responses. Advertise it
+    # on full responses too, so that clients know they can resume.
+    response.accept_ranges = "bytes"
+    return response
@@ -0,0 +1,163 @@
+"""Slices of the hourly data of weather files.
+
+The hourly data of a weather file is read from its columnar sidecar (see
+`wxfs.columnar`), which is written the first time the data is needed, so that
+repeated requests do not parse the text of the file again. A slice is selected
+by variable and by time window within the year, and streamed as JSON (an array
+of one object per hour) or CSV (a header row, then one row per hour), a batch of
+hours at a time.
+
+Times are given as `MM-DD` or `MM-DDTHH`, where the hour is as in EPW files:
+1 to 24, each hour named by its end. A window from `start` to `end` includes
+both; a window whose `end` precedes its `start` wraps around the end of the
+year (e.g., from `12-01` to `02-28` selects the winter months).
+"""
+
+import csv
+import io
+import re
+
+import numpy as np
+from connexion.exceptions import BadRequestProblem, ProblemException
+from flask import current_app, stream_with_context
+
+from wxfs import columnar, epw
+from wxfs.api.streaming import batch_size, json_array_chunks
+
+
+# Variables identifying the hour of each row, which every slice includes.
+time_variables = ("month", "day", "hour")
+
+# Variables that can be selected: all others.
+data_variables = tuple(name for name in epw.variables if name not in time_variables)
+
+# Decimal places to which values are rounded. Values are stored as float32 (see
+# `wxfs.columnar`), and converting them to decimal in full precision would
+# expose representation error (e.g., 1.100000023841858 for 1.1).
+decimals = 4
+
+time_regex = re.compile(r"(?P<month>\d\d)-(?P<day>\d\d)(?:T(?P<hour>\d\d))?")
+
+
+def time_key(month, day, hour):
+    """Return a number ordering hours within the year."""
+    return (month * 100 + day) * 100 + hour
+
+
+def hour_keys(data):
+    """Return an array of the keys (see `time_key`) of the hours of hourly data
+    `data`."""
+    return time_key(
+        data["month"].astype(np.int32),
+        data["day"].astype(np.int32),
+        data["hour"].astype(np.int32),
+    )
+
+
+def parse_time(name, value, default_hour):
+    """Parse a time parameter (`MM-DD` or `MM-DDTHH`) into a key (see
+    `time_key`). If the hour is not given, `default_hour` is used."""
+    match = time_regex.fullmatch(value)
+    if match is None:
+        raise BadRequestProblem(
+            detail=f"Parameter '{name}' is not of the form MM-DD or MM-DDTHH"
+        )
+    month, day = int(match["month"]), int(match["day"])
+    hour = default_hour if match["hour"] is None else int(match["hour"])
+    if not (1 <= month <= 12 and 1 <= day <= 31 and 1 <= hour <= 24):
+        raise BadRequestProblem(detail=f"Parameter '{name}' is not a valid time")
+    return time_key(month, day, hour)
+
+
+def window_rows(data, start=None, end=None):
+    """Return the indexes of the rows of hourly data `data` in the time window
+    from `start` to `end` (time parameters; either may be omitted)."""
+    keys = hour_keys(data)
+    first = None if start is None else parse_time("start", start, 1)
+    last = None if end is None else parse_time("end", end, 24)
+    if first is None and last is None:
+        return np.arange(len(keys))
+    if first is None:
+        selected = keys <= last
+    elif last is None:
+        selected = keys >= first
+    elif first <= last:
+        selected = (keys >= first) & (keys <= last)
+    else:
+        selected = (keys >= first) | (keys <= last)
+    return np.flatnonzero(selected)
+
+
+def load_data(id, filepath):
+    """Return the hourly data of weather file `filepath` (file `id`).
+
+    :raises ProblemException: (404) if the file is missing or its data can't be
+        parsed. Other errors, such as failing to write a sidecar, are server
+        errors and are not handled.
+    """
+    try:
+        return columnar.load(filepath, current_app.config["WXFS_SIDECAR_DIRECTORY"])
+    except (FileNotFoundError, ValueError):
+        raise ProblemException(
+            status=404,
+            title="Not Found",
+            detail=f"No hourly data for file {id}",
+        )
+
+
+def column_values(values):
+    """Return a column of a slice as a list of Python values."""
+    if values.dtype.kind == "f":
+        return np.round(values.astype(np.float64), decimals).tolist()
+    return values.tolist()
+
+
+def row_batches(data, rows, names):
+    """Generate the selected rows of hourly data, `batch_size` at a time, each
+    batch as a list of tuples of the values of variables `names`."""
+    for offset in range(0, len(rows), batch_size):
+        batch = rows[offset : offset + batch_size]
+        yield list(zip(*(column_values(data[name][batch]) for name in names)))
+
+
+def csv_chunks(batches, names):
+    """Generate CSV, in chunks of bytes, from a header row and batches of
+    rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(names)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def data_response(id, filepath, variables=None, start=None, end=None, format="json"):
+    """Return a response streaming a slice of the hourly data of weather file
+    `filepath` (file `id`).
+
+    :param variables: Names of the variables to include, besides the time
+        variables; None for all.
+    :param start: Start of the time window (see module docstring).
+    :param end: End of the time window.
+    :param format: "json" or "csv".
+    """
+    data = load_data(id, filepath)
+    rows = window_rows(data, start, end)
+    names = time_variables + tuple(
+        name for name in data_variables if variables is None or name in variables
+    )
+    batches = row_batches(data, rows, names)
+    if format == "csv":
+        chunks = csv_chunks(batches, names)
+        mimetype = "text/csv"
+    else:
+        chunks = json_array_chunks(
+            (row for batch in batches for row in batch),
+            lambda row: dict(zip(names, row)),
+        )
+        mimetype = "application/json"
+    return current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
@@ -1,16 +1,198 @@
-from flask import url_for
-from wxfs.database import Location
+import datetime
+import os
+from operator import attrgetter
+
+from connexion.exceptions import ProblemException
+from flask import current_app, url_for
+from wxfs.database import Location, File, WxFile
 from wxfs import get_app_session
-from wxfs.api.files import collection_rep as files_collection_rep
+from wxfs.api.files import file_rows, row_serializer
+from wxfs.api.archives import existing_members, zip_stream
+from wxfs.api.caching import cached
+from wxfs.api.comparison import file_comparison
+from wxfs.api.hourly import data_variables
+from wxfs.api.pagination import paginate, next_link
+from wxfs.api.payloads import Payload, serve_payload
+from wxfs.api.serialization import compile_rep, uri_template
+from wxfs.search import TextIndex
+from wxfs.spatial import SpatialIndex, ClusterGrid
+
+
+# Columns backing the location fields of a representation.
+field_columns = {
+    "city": Location.city,
+    "province": Location.province,
+    "country": Location.country,
+    "code": Location.code,
+    "latitude": Location.latitude,
+    "longitude": Location.longitude,
+    "elevation": Location.elevation,
+}
+
+
+def location_rows(fields=None):
+    """Return a query for locations as rows of column values, with the id and
+    the columns needed for `fields` (None for all)."""
+    return get_app_session().query(
+        Location.id,
+        *(
+            column
+            for name, column in field_columns.items()
+            if fields is None or name in fields
+        ),
+    )
 
-locations_memo = None
 
 def uri(location):
     return url_for(".wxfs_api_locations_get", id=location.id)
 
 
-def single_item_rep(location):
-    """Return representation of a single location item."""
+def item_getters(self_uri):
+    """Return a dict mapping each field of the representation of a location to
+    a function computing its value from a location row.
+
+    :param self_uri: Function returning the URI of a location from its id.
+    """
+    return {
+        "id": attrgetter("id"),
+        "selfUri": lambda location: self_uri(location.id),
+        **{name: attrgetter(name) for name in field_columns},
+    }
+
+
+def location_files(location_ids, include):
+    """Return representations of the files of locations, by location id.
+
+    The files of all the locations are loaded in a single query, as rows of
+    column values (see `wxfs.api.files.file_rows`): weather files first, then
+    summary files.
+
+    :param include: "files" for file representations, "ids" for file ids.
+    """
+    result = {id: [] for id in location_ids}
+    if not result:
+        return result
+    if include == "ids":
+        rows = get_app_session().query(File.location_id, File.id)
+        rep = attrgetter("id")
+    else:
+        rows = file_rows()
+        rep = row_serializer()
+    rows = rows.filter(File.location_id.in_(result)).order_by(
+        File.fileType != "weather", File.id
+    )
+    for row in rows:
+        result[row.location_id].append(rep(row))
+    return result
+
+
+def collection_rep(locations, fields=None, include="files"):
+    """Return representation of locations collection, from location rows.
+
+    :param fields: Names of the fields to include; None for all.
+    :param include: How files are included: "files" (full representations),
+        "ids" (file ids only), or "none".
+    """
+    rep = compile_rep(item_getters(uri_template(".wxfs_api_locations_get")), fields)
+    if include == "none":
+        return [rep(location) for location in locations]
+    files = location_files([location.id for location in locations], include)
+    return [{**rep(location), "files": files[location.id]} for location in locations]
+
+
+def single_item_rep(location, fields=None, include="files"):
+    """Return representation of a single location item, from a location row."""
+    return collection_rep([location], fields, include)[0]
+
+
+@serve_payload
+@cached
+def listing(fields=None, include="files", limit=None, after=None):
+    """Return a list of locations, optionally paged (see `wxfs.api.pagination`).
+
+    Due to the potentially large number of locations, results are cached,
+    already serialized and compressed, until the catalog changes (see
+    `wxfs.cache`, `wxfs.api.payloads`).
+    """
+    locations, next_after = paginate(
+        location_rows(fields), Location.id, limit=limit, after=after
+    )
+    return Payload(
+        collection_rep(locations, fields, include),
+        headers=next_link(next_after, limit),
+    )
+
+
+@cached
+def get(id=None, fields=None, include="files"):
+    location = location_rows(fields).filter(Location.id == id).one()
+    return single_item_rep(location, fields, include)
+
+
+@cached
+def spatial_index():
+    """Return a spatial index of location ids. It is built once per catalog
+    generation."""
+    rows = get_app_session().query(Location.id, Location.latitude, Location.longitude)
+    return SpatialIndex(
+        (float(latitude), float(longitude), id) for id, latitude, longitude in rows
+    )
+
+
+def nearest(lat, lon, k=10):
+    """Return the `k` locations nearest a point, nearest first. Each location
+    has an additional attribute `distance` (great-circle distance, km).
+
+    The spatial index may be up to a cache check interval older than the
+    catalog, so locations deleted since it was built are left out.
+    """
+    found = spatial_index().nearest(lat, lon, k)
+    locations = {
+        location.id: location
+        for location in location_rows().filter(
+            Location.id.in_([id for _, id in found])
+        )
+    }
+    found = [(distance, id) for distance, id in found if id in locations]
+    reps = collection_rep([locations[id] for _, id in found])
+    return [
+        {**rep, "distance": distance} for rep, (distance, _) in zip(reps, found)
+    ]
+
+
+@cached
+def cluster_grid():
+    """Return a cluster grid of locations, with minimal properties for map
+    display. It is built once per catalog generation."""
+    rows = get_app_session().query(
+        Location.id,
+        Location.latitude,
+        Location.longitude,
+        Location.city,
+        Location.province,
+        Location.code,
+    )
+    return ClusterGrid(
+        (
+            float(latitude),
+            float(longitude),
+            {"id": id, "city": city, "province": province, "code": code},
+        )
+        for id, latitude, longitude, city, province, code in rows
+    )
+
+
+def geojson(bbox=None, zoom=None):
+    """Return a GeoJSON FeatureCollection of the locations within a bounding
+    box, clustered for display at a map zoom level (see `ClusterGrid`)."""
+    return {
+        "type": "FeatureCollection",
+        "features": cluster_grid().features(bbox=bbox, zoom=zoom),
+    }
+
+
+def search_item_rep(location):
+    """Return compact representation of a location for search results."""
     return {
         "id": location.id,
         "selfUri": uri(location),
@@ -20,44 +202,114 @@ def single_item_rep(location):
         "code": location.code,
         "latitude": location.latitude,
         "longitude": location.longitude,
-        "elevation": location.elevation,
-        "files": (
-            files_collection_rep(location.wx_files)
-            + files_collection_rep(location.summary_files)
-        ),
     }
 
 
-def collection_item_rep(location):
-    """Return representation of a location collection item.
-    May conceivably be different than representation of a single a location.
-    """
-    return single_item_rep(location)
-
+@cached
+def text_index():
+    """Return a text index of locations by city, province and code. It is
+    built once per catalog generation."""
+    rows = get_app_session().query(
+        Location.id,
+        Location.city,
+        Location.province,
+        Location.country,
+        Location.code,
+        Location.latitude,
+        Location.longitude,
+    )
+    return TextIndex(
+        (search_item_rep(row), row.city, [row.province, row.code]) for row in rows
+    )
 
-def collection_rep(locations):
-    """Return representation of locations collection."""
-    return [collection_item_rep(location) for location in locations]
 
+def search(q, limit=20):
+    """Return locations matching a search string, best first (see
+    `wxfs.search`)."""
+    return text_index().search(q, limit=limit)
 
 
-def listing():
-    """Return a list of all locations.
-    
-    Due to the potentially large number of locations, this function
-    memoizes the result after the first call to avoid repeated database queries.
+def archive(id, scenario=None, version=None):
+    """Return a ZIP archive of the files for a location, streamed.
 
-    TODO: Alternative strategies for caching may be preferable when more can be devoted to this app.
+    Files can be selected by scenario and/or version. Summary files cover all
+    the scenarios of a location, so a summary file for "multiple" scenarios is
+    included whatever the scenario selected. Files missing from storage are
+    left out (see `wxfs.api.archives.existing_members`).
     """
-    global locations_memo
-    if locations_memo is not None:
-        return locations_memo 
-    else:
-        locations = get_app_session().query(Location).order_by(Location.id.asc()).all()
-        locations_memo = collection_rep(locations)
-        return locations_memo
+    sesh = get_app_session()
+    location = sesh.query(Location.city).filter(Location.id == id).one_or_none()
+    if location is None:
+        raise ProblemException(
+            status=404, title="Not Found", detail=f"No location {id}"
+        )
+    city = location.city
+    files = (
+        sesh.query(File.filepath, File.scenario, File.version)
+        .filter(File.location_id == id)
+        .order_by(File.fileType != "weather", File.id)
+    )
 
+    def selected(file):
+        return (
+            scenario is None or file.scenario in (scenario, "multiple")
+        ) and (version is None or file.version == version)
 
-def get(id=None):
-    location = get_app_session().query(Location).filter_by(id=id).one()
-    return single_item_rep(location)
\ No newline at end of file
+    members = existing_members(
+        (file.filepath, os.path.basename(file.filepath))
+        for file in files
+        if selected(file)
+    )
+    response = current_app.response_class(
+        zip_stream(members), mimetype="application/zip"
+    )
+    response.headers.set(
+        "Content-Disposition", "attachment", filename=f"{city}.zip"
+    )
+    return response
+
+
+def period_file(id, scenario, year):
+    """Return (id, filepath) of the weather file for location `id` and scenario
+    `scenario` whose time period starts in `year`. If there are several, the
+    first indexed is returned."""
+    start = datetime.datetime(year, 1, 1)
+    row = (
+        get_app_session()
+        .query(WxFile.id, WxFile.filepath)
+        .filter(
+            WxFile.location_id == id,
+            WxFile.scenario == scenario,
+            WxFile.timePeriodStart >= start,
+            WxFile.timePeriodStart < start.replace(year=year + 1),
+        )
+        .order_by(WxFile.id)
+        .first()
+    )
+    if row is None:
+        raise ProblemException(
+            status=404,
+            title="Not Found",
+            detail=f"No weather file for location {id}, scenario {scenario}, "
+            f"with time period starting in {year}",
+        )
+    return tuple(row)
+
+
+@serve_payload
+def compare(id, scenario, to, variables=None, resolution="monthly", **params):
+    """Return a comparison of the weather files for a location and scenario
+    whose time periods start in years `from` and `to` (see
+    `wxfs.api.comparison`). Comparisons are cached per pair of files.
+
+    Query parameter `from` is a Python keyword, so it arrives in `params`.
+    """
+    names = tuple(
+        name for name in data_variables if variables is None or name in variables
+    )
+    return file_comparison(
+        period_file(id, scenario, params["from"]),
+        period_file(id, scenario, to),
+        names,
+        resolution,
+    )
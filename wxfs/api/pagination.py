@@ -0,0 +1,47 @@
+"""Keyset (cursor) pagination for collection listings.
+
+A page is requested with query parameters `limit` (maximum number of items) and
+`after` (cursor; only items with id greater than this are returned). The cursor
+for the next page is the id of the last item on the current page, so fetching
+any page is a single index range scan on the primary key, no matter how deep the
+client has paged.
+"""
+
+from flask import request, url_for
+
+
+def paginate(query, key, limit=None, after=None):
+    """Apply keyset pagination to a query.
+
+    :param query: SQLAlchemy query for the collection.
+    :param key: Column (primary key) the collection is ordered and paged by.
+    :param limit: Maximum number of items to return; None for no limit.
+    :param after: Cursor; return only items whose key is greater than this.
+    :return: tuple (items, next cursor). The next cursor is None if this is the
+        last page.
+    """
+    if after is not None:
+        query = query.filter(key > after)
+    query = query.order_by(key.asc())
+    if limit is None:
+        return query.all(), None
+    # Fetch one extra item to find out whether there is a next page.
+    items = query.limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        return items, items[-1].id
+    return items, None
+
+
+def next_link(next_after, limit):
+    """Return a `Link` header pointing at the next page of the current request,
+    or no headers at all if there is no next page."""
+    if next_after is None:
+        return {}
+    args = {
+        **request.args.to_dict(flat=False),
+        "after": next_after,
+        "limit": limit,
+    }
+    uri = url_for(request.endpoint, **args)
+    return {"Link": f'<{uri}>; rel="next"'}
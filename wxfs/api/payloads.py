@@ -0,0 +1,100 @@
+"""Pre-serialized JSON response payloads.
+
+A `Payload` holds a JSON representation already serialized to bytes, along with
+compressed variants of those bytes and an entity tag identifying them. Handlers
+whose results are cached (see `wxfs.api.caching`) can return a `Payload` so
+that all this work is done once per catalog generation rather than on every
+request. Decorating such a handler with `serve_payload` turns the `Payload`
+into an HTTP response, negotiating the content encoding and answering
+conditional requests (`If-None-Match`) with 304 Not Modified.
+"""
+
+import functools
+import gzip
+import hashlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+# Bodies smaller than this are not worth compressing.
+min_compress_size = 1024
+
+
+def compressors():
+    """Return a dict of available compressors, by content-coding name, in order
+    of preference."""
+    result = {}
+    if brotli is not None:
+        result["br"] = lambda data: brotli.compress(data, quality=9)
+    result["gzip"] = lambda data: gzip.compress(data, compresslevel=9)
+    return result
+
+
+class Payload:
+    """A JSON response body, serialized and compressed once.
+
+    :param rep: Representation (JSON-serializable) to send.
+    :param headers: Additional response headers.
+    """
+
+    def __init__(self, rep, headers=None):
+        self.headers = headers or {}
+        self.body = current_app.json.dumps(rep).encode("utf-8")
+        self.tag = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.encoded = {"identity": self.body}
+        if len(self.body) >= min_compress_size:
+            for coding, compress in compressors().items():
+                self.encoded[coding] = compress(self.body)
+
+    def etag(self, coding):
+        """Return the (strong) entity tag of the variant with content-coding
+        `coding`. Variants must have distinct strong entity tags."""
+        if coding == "identity":
+            return self.tag
+        return f"{self.tag}-{coding}"
+
+    @property
+    def etags(self):
+        return [self.etag(coding) for coding in self.encoded]
+
+
+def serve_payload(handler):
+    """Decorate an API handler returning a `Payload` so that it returns the
+    corresponding HTTP response instead.
+
+    If the request's `If-None-Match` matches any variant of the payload, the
+    response is 304 Not Modified, with no body.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        payload = handler(*args, **kwargs)
+
+        coding = request.accept_encodings.best_match(
+            list(payload.encoded), default="identity"
+        )
+        headers = {
+            **payload.headers,
+            "ETag": f'"{payload.etag(coding)}"',
+            "Cache-Control": current_app.config["WXFS_CACHE_CONTROL"],
+            "Vary": "Accept-Encoding",
+        }
+
+        if any(request.if_none_match.contains_weak(tag) for tag in payload.etags):
+            return current_app.response_class(status=304, headers=headers)
+
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return current_app.response_class(
+            payload.encoded[coding],
+            status=200,
+            headers=headers,
+            mimetype="application/json",
+        )
+
+    return wrapper
@@ -0,0 +1,51 @@
+"""Streamed JSON responses.
+
+A collection response built in the usual way holds the whole collection in
+memory three times over: as ORM objects, as representations, and as serialized
+JSON. `json_array_response` instead serializes a collection as it is read from
+the database, a batch of rows at a time, and sends each batch of the JSON array
+as soon as it is ready. Memory use is bounded by the batch size, whatever the
+size of the collection, and the first bytes go out as soon as the first batch
+has been read.
+"""
+
+from flask import current_app, stream_with_context
+
+
+# Number of rows fetched from the database, and items sent, at a time.
+batch_size = 1000
+
+
+def json_array_chunks(items, rep):
+    """Generate the JSON serialization of an array, in chunks.
+
+    :param items: Iterable of items, typically a query with `yield_per`.
+    :param rep: Function returning the representation of an item.
+    :return: Generator of bytes, each the serialization of up to `batch_size`
+        items, which concatenate to a JSON array.
+    """
+    dumps = current_app.json.dumps
+    parts = []
+    separator = "["
+    for item in items:
+        parts.append(separator)
+        parts.append(dumps(rep(item)))
+        separator = ","
+        if len(parts) >= 2 * batch_size:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+    parts.append("]" if separator == "," else "[]")
+    yield "".join(parts).encode("utf-8")
+
+
+def json_array_response(query, rep):
+    """Return a response streaming the results of `query` as a JSON array.
+
+    Rows are fetched `batch_size` at a time through a server-side cursor. The
+    request context, and with it the database session, is kept until the
+    stream is exhausted.
+    """
+    chunks = json_array_chunks(query.yield_per(batch_size), rep)
+    return current_app.response_class(
+        stream_with_context(chunks), mimetype="application/json"
+    )
@@ -0,0 +1,108 @@
+"""Cache for values derived from the catalog (the indexed locations and files).
+
+The catalog changes only when the indexer runs, and the indexer records each
+change by incrementing the catalog generation (see
+`wxfs.indexer.db_helpers.bump_catalog_generation`). Cached values are tagged
+with the generation they were computed from and are discarded once the catalog
+generation moves on. To avoid a database round trip on every request, the
+generation is re-read at most once every `check_interval` seconds; that is
+therefore the longest a worker can go on serving stale data.
+
+The cache is bounded; when it is full, the least recently used entry is evicted.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from wxfs.database import CatalogGeneration
+
+
+def catalog_generation(sesh):
+    """Return the current catalog generation, or None if the database does not
+    record one."""
+    try:
+        return sesh.query(CatalogGeneration.generation).scalar()
+    except SQLAlchemyError:
+        # Databases created before the catalog generation was introduced lack
+        # the table. Caches for such a database are simply never invalidated.
+        sesh.rollback()
+        return None
+
+
+class CatalogCache:
+    """LRU cache of values computed from the catalog, invalidated when the
+    catalog generation changes.
+
+    :param get_generation: Callable returning the current catalog generation.
+    :param maxsize: Maximum number of entries.
+    :param check_interval: Minimum time (seconds) between reads of the
+        catalog generation.
+    :param clock: Callable returning the current time (seconds).
+    """
+
+    def __init__(
+        self, get_generation, maxsize=1024, check_interval=5.0, clock=time.monotonic
+    ):
+        self.get_generation = get_generation
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._checked_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def generation(self):
+        """The catalog generation, re-read if the last check is old enough.
+        All entries are discarded if it has changed."""
+        now = self.clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval:
+            generation = self.get_generation()
+            with self._lock:
+                if generation != self._generation:
+                    self._entries.clear()
+                    self._generation = generation
+                self._checked_at = now
+        return self._generation
+
+    def get(self, key, compute):
+        """Return the value cached under `key`, computing and caching it with
+        `compute()` if it is absent or stale.
+
+        :param key: Hashable key, typically naming the endpoint and its
+            parameters.
+        :param compute: Callable with no arguments returning the value.
+        """
+        generation = self.generation
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Compute outside the lock: it is (relatively) slow, and a duplicated
+        # computation on a cold key is harmless.
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (generation, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Discard all entries."""
+        with self._lock:
+            self._entries.clear()
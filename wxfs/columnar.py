@@ -0,0 +1,181 @@
+"""Columnar binary sidecars for the hourly data of EPW files.
+
+Parsing the comma-separated text of an EPW file (see `wxfs.epw.read_data`)
+takes far longer than reading the same data in binary form. A sidecar holds
+the hourly data of one EPW file in binary form, one fixed-type array per
+variable, so that it can be memory-mapped and used in place: `load` returns
+read-only NumPy arrays that are views of the mapped file, without copying or
+parsing anything. Repeated reads of a file are then served from the page
+cache.
+
+A sidecar file consists of:
+
+- the magic bytes `magic`;
+- the length of the header (4 bytes, little-endian unsigned integer);
+- the header: JSON giving the number of rows, the size and modification time
+  of the EPW file the sidecar was converted from, and the name, type and
+  offset (from the start of the data) of each column;
+- padding, up to a multiple of `alignment` bytes;
+- the columns, each starting at a multiple of `alignment` bytes.
+
+Sidecars are kept in a directory of their own, named by a hash of the path of
+the EPW file. They are a cache: `load` converts an EPW file whose sidecar is
+missing, unreadable or stale (the EPW file has changed since it was
+converted), so the directory can be cleared at any time.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from wxfs import epw
+
+
+magic = b"WXFSCOL1"
+alignment = 64
+suffix = ".col"
+
+# Types of the columns; other variables are stored as `value_dtype`. Values in
+# EPW files have at most a few significant digits, which float32 represents
+# exactly enough.
+time_dtypes = {
+    "year": "<i2",
+    "month": "u1",
+    "day": "u1",
+    "hour": "u1",
+    "minute": "u1",
+}
+value_dtype = "<f4"
+
+header_length = struct.Struct("<I")
+
+
+def sidecar_path(filepath, directory):
+    """Return the path of the sidecar of EPW file `filepath` in `directory`.
+    Sidecars are spread over subdirectories, so that no directory holds too
+    many of them."""
+    digest = hashlib.sha256(os.path.abspath(filepath).encode()).hexdigest()
+    return os.path.join(directory, digest[:2], f"{digest}{suffix}")
+
+
+def source_stamp(filepath):
+    """Return the size and modification time of file `filepath`, by which a
+    sidecar is known to be current."""
+    stat = os.stat(filepath)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def aligned(offset):
+    """Return `offset` rounded up to a multiple of `alignment`."""
+    return -(-offset // alignment) * alignment
+
+
+def write(filepath, directory, data=None, stamp=None):
+    """Convert EPW file `filepath` to a sidecar in `directory`.
+
+    The sidecar is written to a temporary file, which then replaces any
+    existing sidecar, so that readers never see a partly written one.
+
+    :param data: Hourly data of the file, as returned by
+        `wxfs.epw.read_data` (all variables); read from the file if None.
+    :param stamp: Stamp of the file (see `source_stamp`) taken before `data`
+        was read; required with `data`.
+    :return: Path of the sidecar.
+    :raises ValueError: if the data can't be parsed.
+    """
+    # The source is stamped before it is read, so that a change made while it
+    # is being read makes the sidecar stale rather than wrong.
+    if data is None:
+        stamp = source_stamp(filepath)
+        data = epw.read_data(filepath)
+    elif stamp is None:
+        raise TypeError("A stamp taken before reading the data is required")
+    rows = len(data["month"])
+
+    columns = []
+    arrays = []
+    offset = 0
+    for name in epw.variables:
+        array = np.ascontiguousarray(
+            data[name], dtype=time_dtypes.get(name, value_dtype)
+        )
+        columns.append({"name": name, "dtype": array.dtype.str, "offset": offset})
+        arrays.append(array)
+        offset = aligned(offset + array.nbytes)
+    header = json.dumps(
+        {"rows": rows, "source": stamp, "columns": columns}, separators=(",", ":")
+    ).encode()
+    prefix = magic + header_length.pack(len(header)) + header
+    data_start = aligned(len(prefix))
+
+    path = sidecar_path(filepath, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(prefix.ljust(data_start, b"\0"))
+            for column, array in zip(columns, arrays):
+                file.seek(data_start + column["offset"])
+                file.write(array.data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
+
+
+def read(path):
+    """Map sidecar `path` into memory.
+
+    :return: tuple (header, dict mapping variable name to a read-only array
+        viewing the mapped column).
+    :raises ValueError: if `path` is not a valid sidecar.
+    """
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    prefix_length = len(magic) + header_length.size
+    if len(mapped) < prefix_length or mapped[: len(magic)] != magic:
+        raise ValueError(f"{path} is not a sidecar")
+    (length,) = header_length.unpack(mapped[len(magic) : prefix_length])
+    header = json.loads(mapped[prefix_length : prefix_length + length])
+    data_start = aligned(prefix_length + length)
+    rows = header["rows"]
+    columns = {
+        column["name"]: np.frombuffer(
+            mapped,
+            dtype=column["dtype"],
+            count=rows,
+            offset=data_start + column["offset"],
+        )
+        for column in header["columns"]
+    }
+    return header, columns
+
+
+def load(filepath, directory, create=True):
+    """Return the hourly data of EPW file `filepath` from its sidecar in
+    `directory`, converting the file first if its sidecar is missing, invalid
+    or stale.
+
+    :param create: If false, do not convert the file; return None instead.
+    :return: dict mapping variable name to read-only array of hourly values,
+        as views of the mapped sidecar.
+    :raises ValueError: if the file must be converted and its data can't be
+        parsed.
+    """
+    path = sidecar_path(filepath, directory)
+    try:
+        header, columns = read(path)
+        if header["source"] == source_stamp(filepath):
+            return columns
+    except (FileNotFoundError, ValueError):
+        pass
+    if not create:
+        return None
+    write(filepath, directory)
+    return read(path)[1]
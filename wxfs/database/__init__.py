@@ -5,9 +5,13 @@
 # TODO: Datetime of indexing? Do we care?
 
 from sqlalchemy import (
+    ARRAY,
+    BigInteger,
     Column,
     DateTime,
     Enum,
+    Float,
+    Index,
     Integer,
     String,
     Numeric,
@@ -63,6 +67,15 @@ class File(Base):
     # Relationships
     location_id = Column(Integer, ForeignKey("locations.location_id"))
 
+    # Indexes support selection of files (`/files` query parameters) and loading
+    # of files by location. Each ends with the primary key, the order in which
+    # files are listed and paged.
+    __table_args__ = (
+        Index("files_location_id_idx", "location_id", "file_id"),
+        Index("files_scenario_version_idx", "scenario", "version", "file_id"),
+        Index("files_version_idx", "version", "file_id"),
+    )
+
     __mapper_args__ = {
         "polymorphic_identity": "files",
         "polymorphic_on": fileType,
@@ -133,5 +146,86 @@ class WxFile(File):
 
     # Relationships
     location = relationship("Location", backref="wx_files")
+    stats = relationship("WxFileStats", uselist=False, passive_deletes=True)
+
+    __table_args__ = (
+        Index(
+            "wx_files_design_data_type_ensemble_statistic_idx",
+            "designDataType",
+            "ensembleStatistic",
+        ),
+        Index("wx_files_time_period_idx", "timePeriodStart", "timePeriodEnd"),
+    )
 
     __mapper_args__ = {"polymorphic_identity": "weather"}
+
+
+class WxFileStats(Base):
+    """Climate statistics of the hourly data of a weather file, computed when it
+    is indexed (see `wxfs.epw.climate_stats`). Temperatures are dry-bulb
+    temperatures (deg C). Design temperatures are named for the percentage of
+    hours in the year for which they hold (e.g., 996 for 99.6%).
+    """
+
+    __tablename__ = "wx_file_stats"
+    id = Column(
+        "wx_file_id",
+        Integer,
+        ForeignKey("wx_files.wx_file_id", ondelete="CASCADE"),
+        primary_key=True,
+        nullable=False,
+    )
+    meanDryBulbTemperature = Column(Float, nullable=False)
+    minDryBulbTemperature = Column(Float, nullable=False)
+    maxDryBulbTemperature = Column(Float, nullable=False)
+    # Base 18 deg C.
+    heatingDegreeDays = Column(Float, nullable=False)
+    coolingDegreeDays = Column(Float, nullable=False)
+    heatingDesignTemperature996 = Column(Float, nullable=False)
+    heatingDesignTemperature990 = Column(Float, nullable=False)
+    coolingDesignTemperature010 = Column(Float, nullable=False)
+    coolingDesignTemperature004 = Column(Float, nullable=False)
+    # January to December.
+    monthlyMeanDryBulbTemperature = Column(ARRAY(Float), nullable=False)
+
+
+class CatalogGeneration(Base):
+    """The catalog generation is a counter that the indexer increments every time
+    it commits changes to the catalog (locations and files). Services use it to
+    find out when data they have cached has gone stale.
+    This table holds (at most) a single row.
+    """
+
+    __tablename__ = "catalog_generation"
+    id = Column("catalog_generation_id", Integer, primary_key=True, nullable=False)
+    generation = Column(Integer, nullable=False, default=0)
+
+
+class ManifestEntry(Base):
+    """A manifest entry records the state of a file as of when it was last
+    indexed, so that re-indexing can skip files that have not changed since.
+    There is an entry for every file the indexer has examined, whether or not
+    it could be indexed.
+    """
+
+    __tablename__ = "manifest"
+    filepath = Column(String(2048), primary_key=True, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    # Modification time, seconds since the epoch.
+    mtime = Column(Float, nullable=False)
+    # Content hash (SHA-256, hex), if recorded.
+    hash = Column(String(64), nullable=True)
+
+
+class IndexCheckpoint(Base):
+    """An index checkpoint records the last location directory in a collection
+    whose indexing has been committed, so that an interrupted indexing run can
+    be resumed after it. There is (at most) one row per collection directory,
+    which is removed when a run completes.
+    """
+
+    __tablename__ = "index_checkpoints"
+    # Absolute path of the collection directory.
+    root = Column(String(2048), primary_key=True, nullable=False)
+    # Name of the last location directory committed.
+    location = Column(String(2048), nullable=False)
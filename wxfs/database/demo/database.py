@@ -6,7 +6,7 @@ from sqlalchemy.orm import sessionmaker
 
 from wxfs.fake_data import locations as locations_data
 from wxfs.database import Base, Location, WxFile, SummaryFile
-from wxfs.indexer.db_helpers import find_or_insert
+from wxfs.indexer.db_helpers import find_or_insert, bump_catalog_generation
 
 
 def dict_subset(d, keys):
@@ -61,6 +61,7 @@ def populate(session):
                     {"filepath": "filepath"},
                 )
 
+    bump_catalog_generation(session)
     session.commit()
 
 
@@ -0,0 +1,120 @@
+"""Reading and summarizing the hourly data of EPW (EnergyPlus Weather) files.
+
+An EPW file has 8 header lines, followed by one comma-separated line of data
+per hour of the year (8760 in all; 8784 in a leap year). `read_data` parses the
+data into NumPy arrays, one per variable. `climate_stats` computes aggregate
+statistics of the data, vectorized.
+"""
+
+import numpy as np
+
+
+header_lines = 8
+
+# Variables (data fields) of an EPW file, by column. Fields not listed (the
+# data source flags and the present weather codes) are not numbers.
+variables = {
+    "year": 0,
+    "month": 1,
+    "day": 2,
+    "hour": 3,
+    "minute": 4,
+    "dryBulbTemperature": 6,
+    "dewPointTemperature": 7,
+    "relativeHumidity": 8,
+    "atmosphericPressure": 9,
+    "extraterrestrialHorizontalRadiation": 10,
+    "extraterrestrialDirectNormalRadiation": 11,
+    "horizontalInfraredRadiation": 12,
+    "globalHorizontalRadiation": 13,
+    "directNormalRadiation": 14,
+    "diffuseHorizontalRadiation": 15,
+    "globalHorizontalIlluminance": 16,
+    "directNormalIlluminance": 17,
+    "diffuseHorizontalIlluminance": 18,
+    "zenithLuminance": 19,
+    "windDirection": 20,
+    "windSpeed": 21,
+    "totalSkyCover": 22,
+    "opaqueSkyCover": 23,
+    "visibility": 24,
+    "ceilingHeight": 25,
+    "presentWeatherObservation": 26,
+    "precipitableWater": 28,
+    "aerosolOpticalDepth": 29,
+    "snowDepth": 30,
+    "daysSinceLastSnowfall": 31,
+    "albedo": 32,
+    "liquidPrecipitationDepth": 33,
+    "liquidPrecipitationQuantity": 34,
+}
+
+# Base temperature (deg C) for heating and cooling degree days.
+degree_day_base = 18.0
+
+
+def read_data(filepath, names=None):
+    """Read the hourly data of EPW file `filepath`.
+
+    :param names: Names of the variables to read (see `variables`); None for
+        all.
+    :return: dict mapping variable name to array of hourly values (float64).
+    :raises ValueError: if the data can't be parsed.
+    """
+    names = list(variables) if names is None else list(names)
+    table = np.loadtxt(
+        filepath,
+        delimiter=",",
+        skiprows=header_lines,
+        usecols=[variables[name] for name in names],
+        ndmin=2,
+    )
+    if len(table) == 0:
+        raise ValueError(f"No data in {filepath}")
+    return dict(zip(names, table.T))
+
+
+# Variables needed by `climate_stats`.
+stats_variables = ("month", "day", "dryBulbTemperature")
+
+
+def climate_stats(data):
+    """Return climate statistics of hourly data (see `read_data`).
+
+    Degree days are computed from daily mean temperatures, against base
+    temperature `degree_day_base`. Design temperatures are the dry-bulb
+    temperatures exceeded (heating) or not exceeded (cooling) in the given
+    percentage of hours of the year, as for ASHRAE annual design conditions:
+    e.g., the 99.6% heating design temperature is the 0.4th percentile.
+
+    :return: dict mapping statistic name (as `wxfs.database.WxFileStats`
+        attributes) to value.
+    """
+    temperature = data["dryBulbTemperature"]
+    month = data["month"].astype(int)
+
+    _, day_index = np.unique(month * 100 + data["day"].astype(int), return_inverse=True)
+    daily_mean = np.bincount(day_index, weights=temperature) / np.bincount(day_index)
+    monthly_sum = np.bincount(month, weights=temperature, minlength=13)[1:]
+    monthly_count = np.bincount(month, minlength=13)[1:]
+    design = np.percentile(temperature, [0.4, 1.0, 99.0, 99.6])
+
+    return {
+        "meanDryBulbTemperature": float(temperature.mean()),
+        "minDryBulbTemperature": float(temperature.min()),
+        "maxDryBulbTemperature": float(temperature.max()),
+        "heatingDegreeDays": float(
+            np.clip(degree_day_base - daily_mean, 0, None).sum()
+        ),
+        "coolingDegreeDays": float(
+            np.clip(daily_mean - degree_day_base, 0, None).sum()
+        ),
+        "heatingDesignTemperature996": float(design[0]),
+        "heatingDesignTemperature990": float(design[1]),
+        "coolingDesignTemperature010": float(design[2]),
+        "coolingDesignTemperature004": float(design[3]),
+        "monthlyMeanDryBulbTemperature": [
+            float(total / count) if count else None
+            for total, count in zip(monthly_sum, monthly_count)
+        ],
+    }
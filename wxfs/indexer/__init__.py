@@ -8,12 +8,20 @@ the existing collection of weather files now at PCIC.
 
 # Goals: Allow re-indexing, adding new files to same directory, etc.
 
+import contextlib
+import functools
 import os
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from wxfs.database import Location, WxFile, SummaryFile
-from wxfs.indexer.file_parsing import get_wx_file_info, summarize_attribute
-from wxfs.indexer.db_helpers import find_or_insert
+from wxfs import columnar, epw
+from wxfs.database import Location, WxFile, WxFileStats, SummaryFile
+from wxfs.indexer.file_parsing import summarize_attribute
+from wxfs.indexer.headers import scan_header
+from wxfs.indexer.db_helpers import find_or_insert, bump_catalog_generation
+from wxfs.indexer.bulk import BulkWriter
+from wxfs.indexer import checkpoint, manifest
 
 
 # Set up logging
@@ -38,22 +46,179 @@ summary_file_extension = ".xlsx"
 # Indexing functions
 
 
-def index_location_collection(sesh, version, filepath):
+def commit(sesh):
+    """Commit indexing work in session `sesh`.
+
+    Also bumps the catalog generation, which tells running services that the
+    catalog has changed and their caches must be refreshed.
+    """
+    bump_catalog_generation(sesh)
+    sesh.commit()
+
+
+def index_location_collection(
+    sesh,
+    version,
+    filepath,
+    workers=None,
+    bulk=False,
+    incremental=False,
+    hashes=False,
+    commit_every=None,
+    resume=False,
+    climate_stats=False,
+    sidecar_directory=None,
+):
     """
     Index a collection of location subdirectories in directory `filepath`.
 
+    Scanning location directories and parsing their weather files touches only
+    the filesystem, and on network storage it is slow mostly for waiting on it.
+    With `workers`, that work is done for several locations at a time by a pool
+    of threads. The parsed results are written to the database in this thread,
+    which alone uses `sesh`, in the same order as without workers.
+
+    Every file examined is recorded in the manifest (see
+    `wxfs.indexer.manifest`). With `incremental`, files are first compared
+    with the manifest, without opening them: removed and changed files are
+    removed from the catalog, and only location directories containing added
+    or changed files are indexed.
+
+    Location directories are indexed in order of name. With `commit_every`,
+    the work is committed after every so many location directories, along with
+    a checkpoint (see `wxfs.indexer.checkpoint`), and the session is then
+    cleared, so that a large collection is indexed in bounded memory and an
+    interruption loses only the work since the last commit. With `resume`,
+    location directories up to the checkpoint are skipped, and with
+    `incremental` too, their files are left out of the comparison with the
+    manifest. Work after the last commit is left for the caller to commit.
+
     :param sesh: SQLAlchemy session for a Wx Files database.
     :param filepath: Filepath to root directory.
-    :return:
+    :param workers: Number of worker threads scanning and parsing location
+        directories; None or 0 to do everything in this thread.
+    :param bulk: If true, write to the database in batches (see
+        `wxfs.indexer.bulk`) rather than file by file.
+    :param incremental: If true, index only what has changed since files were
+        last indexed.
+    :param hashes: If true, record content hashes in the manifest, and use them
+        to recognize unchanged files.
+    :param commit_every: Number of location directories indexed per commit;
+        None or 0 to leave all the work for the caller to commit.
+    :param resume: If true, resume after the checkpoint of an interrupted run.
+    :param climate_stats: If true, compute the climate statistics of weather
+        files (see `parse_wx_file`).
+    :param sidecar_directory: If given, convert weather files to sidecars in
+        this directory (see `parse_wx_file`).
+    :return: Number of files indexed.
     """
     logger.info(f"Indexing location collection at {filepath}")
-    for entry in os.scandir(filepath):
-        logger.debug(f"{entry} {entry.is_dir()} {entry.path}")
-        if entry.is_dir():
-            index_location(sesh, version, entry.path)
+    start = time.perf_counter()
+    # Files are recorded, in the catalog and the manifest, and checkpoints are
+    # kept, under the absolute path of the collection.
+    root = os.path.abspath(filepath)
+    directories = sorted(entry.path for entry in os.scandir(root) if entry.is_dir())
+    scanned = len(directories)
+
+    last = None
+    if resume:
+        last = checkpoint.load_checkpoint(sesh, root)
+        if last is not None:
+            logger.info(f"Resuming after location directory {last}")
+            directories = [
+                directory
+                for directory in directories
+                if os.path.basename(directory) > last
+            ]
+
+    count = 0
+    examined = {}
+    with contextlib.ExitStack() as stack:
+        if workers:
+            map_ = stack.enter_context(ThreadPoolExecutor(max_workers=workers)).map
+        else:
+            map_ = map
+
+        if incremental:
+            scans = list(map_(scan_location, directories))
+            stats = {
+                path: stat
+                for *_, location_stats in scans
+                for path, stat in location_stats.items()
+            }
+            entries = manifest.load_manifest(sesh, root)
+            if last is not None:
+                # Files in the location directories skipped were not scanned,
+                # so must not be compared (and found removed).
+                entries = {
+                    path: entry
+                    for path, entry in entries.items()
+                    if os.path.relpath(path, root).split(os.sep)[0] > last
+                }
+            added, changed, removed, touched = manifest.compare(
+                entries, stats, hashes=hashes
+            )
+            logger.info(
+                f"Found {len(added)} added, {len(changed)} changed, "
+                f"{len(removed)} removed, "
+                f"{len(stats) - len(added) - len(changed)} unchanged files"
+            )
+            manifest.remove(sesh, changed | removed)
+            manifest.record(sesh, {path: stats[path] for path in touched}, hashes)
+            modified = added | changed
+            directories = [
+                directory
+                for directory, (*_, location_stats) in zip(directories, scans)
+                if not modified.isdisjoint(location_stats)
+            ]
+
+        writer = BulkWriter(sesh, version) if bulk else None
+        uncommitted = 0
+        parse = functools.partial(
+            parse_location,
+            climate_stats=climate_stats,
+            sidecar_directory=sidecar_directory,
+        )
+        for parsed_location in map_(parse, directories):
+            if bulk:
+                writer.write(parsed_location)
+            else:
+                count += len(write_location(sesh, version, parsed_location))
+            examined.update(parsed_location[3])
+
+            uncommitted += 1
+            if commit_every and uncommitted >= commit_every:
+                if bulk:
+                    writer.flush()
+                    count = writer.count
+                manifest.record(sesh, examined, hashes)
+                checkpoint.save_checkpoint(
+                    sesh, root, os.path.basename(parsed_location[0])
+                )
+                commit(sesh)
+                sesh.expunge_all()
+                examined = {}
+                uncommitted = 0
+                elapsed = time.perf_counter() - start
+                logger.info(f"Committed {count} files ({count / elapsed:.1f} files/s)")
+        if bulk:
+            writer.flush()
+            count = writer.count
+
+    manifest.record(sesh, examined, hashes)
+    checkpoint.clear_checkpoint(sesh, root)
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"Indexed {count} files in {len(directories)} of {scanned} location "
+        f"directories in {elapsed:.1f} s ({count / elapsed:.1f} files/s)"
+    )
+    return count
 
 
-def index_location(sesh, version, filepath):
+def index_location(
+    sesh, version, filepath, climate_stats=False, sidecar_directory=None
+):
     """
     Index a single location, defined by the files in location directory at `filepath`.
 
@@ -62,15 +227,32 @@ def index_location(sesh, version, filepath):
 
     :param sesh: SQLAlchemy session for a Wx Files database.
     :param filepath: Filepath of a location directory.
+    :param climate_stats: If true, compute the climate statistics of weather
+        files (see `parse_wx_file`).
+    :param sidecar_directory: If given, convert weather files to sidecars in
+        this directory (see `parse_wx_file`).
     :return: list of Wx Files database file objects.
     """
+    return write_location(
+        sesh,
+        version,
+        parse_location(
+            filepath,
+            climate_stats=climate_stats,
+            sidecar_directory=sidecar_directory,
+        ),
+    )
 
-    logger.info(f"Indexing location at {filepath}")
 
+def scan_location(filepath):
+    """Return the weather filepaths, the summary filepath (or None), and the
+    sizes and modification times of these files (as a dict mapping filepath to
+    (size, modification time)) found in location directory `filepath`."""
     # We assume there are few (relevant) files in each directory, so that accumulating
     # all their paths is no big deal.
     wx_filepaths = []
     summary_filepath = None
+    stats = {}
     for entry in os.scandir(filepath):
         path = entry.path
         name, extension = os.path.splitext(path)
@@ -80,17 +262,56 @@ def index_location(sesh, version, filepath):
             if extension == wx_file_extension:
                 logger.debug(f"Found wx file {path}")
                 wx_filepaths.append(path)
+                stats[path] = manifest.file_stat(entry)
             elif extension == summary_file_extension:
                 logger.debug(f"Found summary file {path}")
                 summary_filepath = path
+                stats[path] = manifest.file_stat(entry)
             else:
                 logger.debug(f"Found unknown type of file {path}")
+    return wx_filepaths, summary_filepath, stats
+
 
-    files = [index_wx_file(sesh, version, filepath) for filepath in wx_filepaths]
+def parse_location(filepath, climate_stats=False, sidecar_directory=None):
+    """Scan location directory `filepath` and parse its weather files.
 
-    # index_wx_file() can return None if it skips a file. Filter these
+    This does not use the database, so it can be run in worker threads.
+
+    :return: tuple (filepath, list of parsed weather files (see
+        `parse_wx_file`), summary filepath or None, file stats (see
+        `scan_location`)).
+    """
+    logger.info(f"Scanning location at {filepath}")
+    wx_filepaths, summary_filepath, stats = scan_location(filepath)
+    parsed_wx_files = [
+        parse_wx_file(
+            path, climate_stats=climate_stats, sidecar_directory=sidecar_directory
+        )
+        for path in wx_filepaths
+    ]
+    return filepath, parsed_wx_files, summary_filepath, stats
+
+
+def write_location(sesh, version, parsed_location):
+    """Index a location parsed by `parse_location` into the database.
+
+    :return: list of Wx Files database file objects.
+    """
+    filepath, parsed_wx_files, summary_filepath, _ = parsed_location
+    logger.info(f"Indexing location at {filepath}")
+
+    files = [
+        write_wx_file(sesh, version, *parsed_wx_file)
+        for parsed_wx_file in parsed_wx_files
+    ]
+
+    # write_wx_file() can return None if it skips a file. Filter these
     # from the results lest the following loops crash and burn
-    skipped = [filepath for x, filepath in zip(files, wx_filepaths) if x is None]
+    skipped = [
+        parsed_wx_file[0]
+        for x, parsed_wx_file in zip(files, parsed_wx_files)
+        if x is None
+    ]
     logger.info(
         "The following files were not indexed for a variety of reasons: %s",
         skipped,
@@ -116,7 +337,9 @@ def index_location(sesh, version, filepath):
     return files
 
 
-def index_wx_file(sesh, version, filepath):
+def index_wx_file(
+    sesh, version, filepath, climate_stats=False, sidecar_directory=None
+):
     """Index a weather file into the database.
 
     A weather file contains all information necessary to determine both its location
@@ -125,28 +348,86 @@ def index_wx_file(sesh, version, filepath):
 
     :param sesh: SQLAlchemy session for a Wx Files database.
     :param filepath: Filepath of weather file to index.
+    :param climate_stats: If true, compute the climate statistics of the file
+        (see `parse_wx_file`).
+    :param sidecar_directory: If given, convert the file to a sidecar in this
+        directory (see `parse_wx_file`).
     :return: WxFile ORM object
     """
-    logger.info(f"Indexing weather file {filepath}")
+    return write_wx_file(
+        sesh,
+        version,
+        *parse_wx_file(
+            filepath,
+            climate_stats=climate_stats,
+            sidecar_directory=sidecar_directory,
+        ),
+    )
+
+
+def parse_wx_file(filepath, climate_stats=False, sidecar_directory=None):
+    """Parse a weather file (see `wxfs.indexer.headers`). This does not use the
+    database.
+
+    Parsing the metadata reads only the start of the file. With
+    `climate_stats` or `sidecar_directory`, the hourly data is read too, once,
+    and climate statistics are computed from it (see
+    `wxfs.epw.climate_stats`) and/or it is written to a sidecar in
+    `sidecar_directory` (see `wxfs.columnar`).
+
+    :return: tuple (filepath, location info, weather file info, climate
+        statistics); the infos are None if the file could not be processed
+        (see `scan_header`), and the statistics are None if not requested or
+        the data could not be read.
+    """
+    logger.info(f"Parsing weather file {filepath}")
     check_extension(filepath, wx_file_extension)
-    with open(filepath, "r") as file:
-        location_info, wx_file_info = get_wx_file_info(file)
-        if location_info is None or wx_file_info is None:
-            logger.info(f"Weather file {filepath} could not be processed, skipping")
-            return None
-        location = find_or_insert(sesh, Location, location_info, {})
-        wx_file = find_or_insert(
-            sesh,
-            WxFile,
-            {
-                "fileType": "weather",
-                **wx_file_info,
-                "location": location,
-                "version": version,
-            },
-            {"filepath": filepath},
-        )
-        return wx_file
+    location_info, wx_file_info = scan_header(filepath)
+    stats = None
+    if wx_file_info is not None and (climate_stats or sidecar_directory):
+        names = None if sidecar_directory else epw.stats_variables
+        try:
+            # Stamped before the data is read (see `wxfs.columnar.write`).
+            stamp = columnar.source_stamp(filepath)
+            data = epw.read_data(filepath, names)
+        except ValueError as e:
+            logger.warning(f"Could not read data of weather file {filepath}: {e}")
+        else:
+            if climate_stats:
+                stats = epw.climate_stats(data)
+            if sidecar_directory:
+                columnar.write(filepath, sidecar_directory, data, stamp)
+    return filepath, location_info, wx_file_info, stats
+
+
+def write_wx_file(
+    sesh, version, filepath, location_info, wx_file_info, climate_stats=None
+):
+    """Index a weather file parsed by `parse_wx_file` into the database.
+
+    Climate statistics are recorded if given and the file has none yet.
+
+    :return: WxFile ORM object, or None if the file could not be processed.
+    """
+    logger.info(f"Indexing weather file {filepath}")
+    if location_info is None or wx_file_info is None:
+        logger.info(f"Weather file {filepath} could not be processed, skipping")
+        return None
+    location = find_or_insert(sesh, Location, location_info, {})
+    wx_file = find_or_insert(
+        sesh,
+        WxFile,
+        {
+            "fileType": "weather",
+            **wx_file_info,
+            "location": location,
+            "version": version,
+        },
+        {"filepath": filepath},
+    )
+    if climate_stats is not None and wx_file.stats is None:
+        wx_file.stats = WxFileStats(**climate_stats)
+    return wx_file
 
 
 def index_summary_file(sesh, location, scenario, version, filepath):
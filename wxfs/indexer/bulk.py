@@ -0,0 +1,233 @@
+"""Bulk indexing.
+
+Indexing file by file (`wxfs.indexer.write_location`) finds each location and
+file in the database with its own query before inserting it, and inserts it
+with its own statements; that is several round trips per file. `BulkWriter`
+instead loads the natural keys of all existing locations and files once, up
+front, matches parsed files against them in memory, and inserts new rows in
+batches with multi-row INSERT statements. Indexing a batch takes a handful of
+statements, however many files are in it.
+
+Natural keys are the attributes by which the file-by-file indexer finds
+existing rows (see `wxfs.indexer.db_helpers.find_or_insert`), so both ways of
+indexing recognize the same rows as already indexed.
+"""
+
+import logging
+
+from sqlalchemy import insert
+
+from wxfs.database import Location, WxFile, WxFileStats, SummaryFile
+
+
+logger = logging.getLogger(__name__)
+
+
+location_columns = (
+    "city",
+    "province",
+    "country",
+    "code",
+    "latitude",
+    "longitude",
+    "elevation",
+)
+wx_file_columns = (
+    "creationDate",
+    "dataSource",
+    "designDataType",
+    "scenario",
+    "timePeriodStart",
+    "timePeriodEnd",
+    "ensembleStatistic",
+    "variables",
+    "anomaly",
+    "smoothing",
+)
+
+
+def location_key(values):
+    """Return the natural key of a location, given its attribute values as a
+    mapping. Coordinates are compared as floats, as parsed, rather than as the
+    decimals the database returns."""
+    return tuple(
+        float(values[name])
+        if name in ("latitude", "longitude", "elevation") and values[name] is not None
+        else values[name]
+        for name in location_columns
+    )
+
+
+def wx_file_key(location_id, version, values):
+    """Return the natural key of a weather file."""
+    return (location_id, version, *(values[name] for name in wx_file_columns))
+
+
+def summary_file_key(location_id, version, scenario):
+    """Return the natural key of a summary file."""
+    return location_id, version, scenario
+
+
+def summarize_scenario(wx_file_infos):
+    """Return the scenario of a summary file covering weather files (see
+    `wxfs.indexer.file_parsing.summarize_attribute`)."""
+    scenarios = {info["scenario"] for info in wx_file_infos}
+    return scenarios.pop() if len(scenarios) == 1 else "multiple"
+
+
+class BulkWriter:
+    """Writes parsed locations (see `wxfs.indexer.parse_location`) to the
+    database in batches.
+
+    Call `write` for each parsed location, then `flush` to write the last
+    batch. Changes are not committed.
+
+    :param sesh: SQLAlchemy session for a Wx Files database.
+    :param version: Data version of the files.
+    :param batch_size: Number of locations written per batch.
+    """
+
+    def __init__(self, sesh, version, batch_size=500):
+        self.sesh = sesh
+        self.version = version
+        self.batch_size = batch_size
+        self.batch = []
+        # Number of files indexed (found or inserted).
+        self.count = 0
+
+        self.location_ids = {
+            location_key(row._mapping): row.id
+            for row in sesh.query(
+                Location.id, *(getattr(Location, name) for name in location_columns)
+            )
+        }
+        self.wx_file_ids = {
+            wx_file_key(row.location_id, row.version, row._mapping): row.id
+            for row in sesh.query(
+                WxFile.id,
+                WxFile.location_id,
+                WxFile.version,
+                *(getattr(WxFile, name) for name in wx_file_columns),
+            )
+        }
+        # Ids of the weather files that have climate statistics.
+        self.stats_ids = {id for id, in sesh.query(WxFileStats.id)}
+        self.summary_file_keys = {
+            summary_file_key(*row)
+            for row in sesh.query(
+                SummaryFile.location_id, SummaryFile.version, SummaryFile.scenario
+            )
+        }
+
+    def write(self, parsed_location):
+        """Add a parsed location to the batch, writing the batch if full."""
+        self.batch.append(parsed_location)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the batch to the database."""
+        batch, self.batch = self.batch, []
+        parsed = []
+        for filepath, parsed_wx_files, summary_filepath, _ in batch:
+            valid, skipped = [], []
+            for parsed_wx_file in parsed_wx_files:
+                path, location_info, wx_file_info, _ = parsed_wx_file
+                if location_info is None or wx_file_info is None:
+                    skipped.append(path)
+                else:
+                    valid.append(parsed_wx_file)
+            if skipped:
+                logger.info(
+                    "The following files were not indexed for a variety of "
+                    "reasons: %s",
+                    skipped,
+                )
+            if not valid:
+                logger.info(f"{filepath} does not contain any recognized files")
+            parsed.append((valid, summary_filepath))
+
+        self.insert_locations(
+            location_info for valid, _ in parsed for _, location_info, _, _ in valid
+        )
+
+        wx_files = []
+        # Keys and climate statistics of the new weather files.
+        new_stats = []
+        # Climate statistics of existing weather files that have none yet.
+        stats = []
+        summary_files = []
+        for valid, summary_filepath in parsed:
+            for path, location_info, wx_file_info, climate_stats in valid:
+                location_id = self.location_ids[location_key(location_info)]
+                key = wx_file_key(location_id, self.version, wx_file_info)
+                if key not in self.wx_file_ids:
+                    self.wx_file_ids[key] = None
+                    wx_files.append(
+                        {
+                            "fileType": "weather",
+                            **wx_file_info,
+                            "location_id": location_id,
+                            "version": self.version,
+                            "filepath": path,
+                        }
+                    )
+                    new_stats.append((key, climate_stats))
+                elif climate_stats is not None:
+                    id = self.wx_file_ids[key]
+                    if id is not None and id not in self.stats_ids:
+                        self.stats_ids.add(id)
+                        stats.append({"id": id, **climate_stats})
+            self.count += len(valid)
+
+            if valid and summary_filepath is not None:
+                location_id = self.location_ids[location_key(valid[0][1])]
+                scenario = summarize_scenario(info for _, _, info, _ in valid)
+                key = summary_file_key(location_id, self.version, scenario)
+                if key not in self.summary_file_keys:
+                    self.summary_file_keys.add(key)
+                    summary_files.append(
+                        {
+                            "fileType": "summary",
+                            "location_id": location_id,
+                            "version": self.version,
+                            "scenario": scenario,
+                            "filepath": summary_filepath,
+                        }
+                    )
+                self.count += 1
+
+        if wx_files:
+            ids = self.sesh.scalars(
+                insert(WxFile).returning(WxFile.id, sort_by_parameter_order=True),
+                wx_files,
+            ).all()
+            for (key, climate_stats), id in zip(new_stats, ids):
+                self.wx_file_ids[key] = id
+                if climate_stats is not None:
+                    self.stats_ids.add(id)
+                    stats.append({"id": id, **climate_stats})
+        if stats:
+            self.sesh.execute(insert(WxFileStats), stats)
+        if summary_files:
+            self.sesh.execute(insert(SummaryFile), summary_files)
+        logger.info(
+            f"Wrote batch of {len(batch)} locations: inserted "
+            f"{len(wx_files)} weather files, {len(summary_files)} summary files"
+        )
+
+    def insert_locations(self, location_infos):
+        """Insert the locations not already in the database, and record their
+        ids."""
+        new = {}
+        for location_info in location_infos:
+            key = location_key(location_info)
+            if key not in self.location_ids:
+                new.setdefault(key, location_info)
+        if not new:
+            return
+        ids = self.sesh.scalars(
+            insert(Location).returning(Location.id, sort_by_parameter_order=True),
+            [{name: info[name] for name in location_columns} for info in new.values()],
+        ).all()
+        self.location_ids.update(zip(new, ids))
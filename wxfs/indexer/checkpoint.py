@@ -0,0 +1,31 @@
+"""Checkpoints for resuming interrupted indexing runs.
+
+A collection indexing run that commits as it goes (see
+`wxfs.indexer.index_location_collection`) indexes location directories in
+order of name and records, in the same transaction as each commit, the name of
+the last location directory committed. A later run with `resume` skips location
+directories up to and including that one. The checkpoint is removed when a run
+completes.
+"""
+
+from wxfs.database import IndexCheckpoint
+
+
+def load_checkpoint(sesh, root):
+    """Return the name of the last location directory committed by an
+    interrupted run indexing collection `root`, or None."""
+    checkpoint = sesh.get(IndexCheckpoint, root)
+    return checkpoint and checkpoint.location
+
+
+def save_checkpoint(sesh, root, location):
+    """Record location directory name `location` as the last committed in
+    collection `root`. Takes effect when the session is committed."""
+    sesh.merge(IndexCheckpoint(root=root, location=location))
+
+
+def clear_checkpoint(sesh, root):
+    """Remove the checkpoint for collection `root`."""
+    sesh.query(IndexCheckpoint).filter(IndexCheckpoint.root == root).delete(
+        synchronize_session=False
+    )
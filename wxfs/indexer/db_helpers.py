@@ -1,5 +1,7 @@
 """Database utility functions for indexer"""
 
+from wxfs.database import CatalogGeneration
+
 
 def find(sesh, Thing, attributes):
     """Find an existing database Thing matching the given attributes."""
@@ -22,3 +24,15 @@ def find_or_insert(sesh, Thing, find_attrs, insert_attrs):
     return find(sesh, Thing, find_attrs) or insert(
         sesh, Thing, {**find_attrs, **insert_attrs}
     )
+
+
+def bump_catalog_generation(sesh):
+    """Record a change to the catalog by incrementing the catalog generation.
+    The increment takes effect when the session is committed.
+    """
+    updated = sesh.query(CatalogGeneration).update(
+        {CatalogGeneration.generation: CatalogGeneration.generation + 1},
+        synchronize_session=False,
+    )
+    if updated == 0:
+        sesh.add(CatalogGeneration(generation=1))
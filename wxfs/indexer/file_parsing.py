@@ -9,6 +9,26 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Patterns, compiled once.
+
+cmip6_file_name_regex = re.compile(
+    r"(?P<timePeriod>\d{4}s)_(?P<country>\w+)_(?P<province>\w+)_(?P<city>.+)"
+    r"\_(?P<dataSource>\w+)\.[eE][pP][wW]"
+)
+cmip5_file_name_regex = re.compile(
+    r"(?P<timePeriod>\d{4}s)_(?P<country>\w+)_(?P<province>\w+)_(?P<city>.+)"
+    r"\.(?P<code>\d+)_(?P<dataSource>\w+)\.[eE][pP][wW]"
+)
+location_regex = re.compile(
+    r"LOCATION,(?P<city>[^,]+),(?P<province>[^,]+),(?P<country>[^,]+),CWEC20\d\d,"
+    r"(?P<code>\w+),(?P<latitude>-?\d+\.\d+),(?P<longitude>-?\d+\.\d+),"
+    r"(?P<tz>-?\d+\.\d+),(?P<elevation>-?\d+\.\d+)"
+)
+creation_date_regex = re.compile(
+    r"Creation Date:\s*(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})"
+)
+
+
 def get_wx_file_info(
     wx_file,
     ver1_metadata_sep=" | ",
@@ -62,27 +82,31 @@ def get_wx_file_info(
                 creation_date_part = line
 
     location_info = parse_location_part(location_part)
+    wx_file_info = make_wx_file_info(wx_file.name, scenario_part, creation_date_part)
+    return location_info, wx_file_info
 
-    file_info = parse_file_name(wx_file.name)
-    if file_info is not None:
-        time_period_centre_year = get_time_period_centre(file_info["timePeriod"])
-        wx_file_info = {
-            "creationDate": parse_creation_date_part(creation_date_part),
-            "dataSource": file_info["dataSource"],
-            "designDataType": "TMY",
-            "scenario": parse_scenario_part(scenario_part),
-            "timePeriodStart": datetime.datetime(time_period_centre_year - 15, 1, 1),
-            "timePeriodEnd": datetime.datetime(time_period_centre_year + 15, 1, 1)
-            - datetime.timedelta(seconds=1),
-            "ensembleStatistic": "average",
-            "variables": "all thermodynamic",
-            "anomaly": "daily",
-            "smoothing": 21,
-        }
-    else:
-        wx_file_info = None
 
-    return location_info, wx_file_info
+def make_wx_file_info(name, scenario_part, creation_date_part):
+    """Return the weather file info for a file with name `name` and the given
+    scenario and creation date metadata parts, or None if the name can't be
+    parsed."""
+    file_info = parse_file_name(name)
+    if file_info is None:
+        return None
+    time_period_centre_year = get_time_period_centre(file_info["timePeriod"])
+    return {
+        "creationDate": parse_creation_date_part(creation_date_part),
+        "dataSource": file_info["dataSource"],
+        "designDataType": "TMY",
+        "scenario": parse_scenario_part(scenario_part),
+        "timePeriodStart": datetime.datetime(time_period_centre_year - 15, 1, 1),
+        "timePeriodEnd": datetime.datetime(time_period_centre_year + 15, 1, 1)
+        - datetime.timedelta(seconds=1),
+        "ensembleStatistic": "average",
+        "variables": "all thermodynamic",
+        "anomaly": "daily",
+        "smoothing": 21,
+    }
 
 
 def parse_file_name(name):
@@ -97,15 +121,9 @@ def parse_file_name(name):
         scenario_start = name.find("RCP") if name.find("RCP") >= 0 else name.find("SSP")
         scenario_end = name.find("_", scenario_start)
         name = name[scenario_end + 1 :]
-        template = re.compile(
-            r"(?P<timePeriod>\d{4}s)_(?P<country>\w+)_(?P<province>\w+)_(?P<city>.+)"
-            r"\_(?P<dataSource>\w+)\.[eE][pP][wW]"
-        )
+        template = cmip6_file_name_regex
     else:
-        template = re.compile(
-            r"(?P<timePeriod>\d{4}s)_(?P<country>\w+)_(?P<province>\w+)_(?P<city>.+)"
-            r"\.(?P<code>\d+)_(?P<dataSource>\w+)\.[eE][pP][wW]"
-        )
+        template = cmip5_file_name_regex
 
     match = template.search(name)
     if match:
@@ -122,11 +140,6 @@ def parse_file_name(name):
 
 def parse_location_part(part):
     """Parse the location part of the first line of a PCIC EPW file."""
-    location_regex = re.compile(
-        r"LOCATION,(?P<city>[^,]+),(?P<province>[^,]+),(?P<country>[^,]+),CWEC20\d\d,"
-        r"(?P<code>\w+),(?P<latitude>-?\d+\.\d+),(?P<longitude>-?\d+\.\d+),"
-        r"(?P<tz>-?\d+\.\d+),(?P<elevation>-?\d+\.\d+)"
-    )
     match = location_regex.match(part)
     if match:
         return {
@@ -143,10 +156,10 @@ def parse_location_part(part):
 
 def parse_creation_date_part(part):
     """Parse the creation date part of the first line of a PCIC EPW file."""
-    regex = re.compile(r"Creation Date:\s*(?P<date>\d{4}-\d{2}-\d{2})")
-    match = regex.search(part)
+    match = creation_date_regex.search(part)
     if match:
-        return datetime.datetime.strptime(match.group("date"), "%Y-%m-%d")
+        # Much faster than strptime, with the same validation.
+        return datetime.datetime(*map(int, match.group("year", "month", "day")))
     return None
 
 
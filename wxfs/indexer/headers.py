@@ -0,0 +1,94 @@
+"""Bounded header scanning for weather files.
+
+`get_wx_file_info` (in `wxfs.indexer.file_parsing`) reads a weather file line
+by line through a text-mode file object. `scan_header` instead reads a fixed
+size block from the start of the file, in a single unbuffered read, and finds
+the metadata lines of either format in one pass over the lines in that block.
+Only those lines are decoded. The metadata is then parsed by the same
+(precompiled) patterns, with the same results.
+
+The metadata lines of either format are among the first few lines of a file,
+well within the block; an EPW file's data, which follows, is never read.
+"""
+
+import collections
+import logging
+
+from wxfs.indexer.file_parsing import make_wx_file_info, parse_location_part
+
+
+logger = logging.getLogger(__name__)
+
+
+# Size (bytes) of the block read from the start of a file.
+header_size = 8192
+# Number of lines in which the metadata must be found.
+max_header_lines = 10
+
+ver1_metadata_sep = " | "
+ver2_scenario_prefix = b"COMMENTS 1"
+ver2_creation_prefix = b"COMMENTS 2"
+
+
+# The metadata parts of a weather file header. The scenario part is None in
+# format 1.
+HeaderParts = collections.namedtuple(
+    "HeaderParts", ("location", "scenario", "creation_date")
+)
+
+
+def read_header(filepath, size=header_size):
+    """Return the first `size` bytes of file `filepath`."""
+    with open(filepath, "rb", buffering=0) as file:
+        return file.read(size)
+
+
+def split_header(block):
+    """Find the metadata parts in `block`, the start of a weather file (see
+    `get_wx_file_info` for the formats).
+
+    :return: `HeaderParts`, or None if the metadata could not be found.
+    """
+    lines = block.split(b"\n", max_header_lines)[:max_header_lines]
+    first = lines[0].decode("utf-8", "replace")
+    if ver1_metadata_sep in first:
+        parts = first.split(ver1_metadata_sep)
+        if len(parts) != 4:
+            logger.error(
+                f"First line (listed below) contained ver 1 metadata separator "
+                f"'{ver1_metadata_sep}' but it did not contain 4 parts. "
+                f"\n{first}"
+            )
+            return None
+        return HeaderParts(parts[0], None, parts[3])
+
+    scenario = creation_date = None
+    for line in lines[1:]:
+        if line.startswith(ver2_scenario_prefix):
+            scenario = line
+        elif line.startswith(ver2_creation_prefix):
+            creation_date = line
+        if scenario and creation_date:
+            return HeaderParts(
+                first,
+                scenario.decode("utf-8", "replace"),
+                creation_date.decode("utf-8", "replace"),
+            )
+    logger.error(f"Neither ver 1 nor ver 2 metadata indicators found in file")
+    return None
+
+
+def scan_header(filepath):
+    """Return the location info and weather file info of weather file
+    `filepath`, as `get_wx_file_info` does, reading only the start of it.
+
+    :return: tuple (location info, weather file info); (None, None) if the
+        metadata could not be found.
+    """
+    parts = split_header(read_header(filepath))
+    if parts is None:
+        return None, None
+    return (
+        parse_location_part(parts.location),
+        make_wx_file_info(filepath, parts.scenario, parts.creation_date),
+    )
@@ -0,0 +1,134 @@
+"""Manifest of indexed files, for incremental indexing.
+
+The manifest (table `manifest`) records the size, modification time and,
+optionally, content hash of every file the indexer has examined. An incremental
+indexing run stats the files in a collection, which does not require opening
+them, and compares the results with the manifest. Only location directories
+containing added or changed files are then parsed and indexed, and files that
+have been removed or changed are removed from the catalog first. A run thus
+costs time in proportion to what has changed, plus the cost of a directory scan.
+
+A file whose size or modification time has changed, but whose recorded content
+hash still matches, is not considered changed; recording hashes thus avoids
+re-indexing files that are merely touched or copied, at the cost of reading
+every file when it is indexed.
+"""
+
+import hashlib
+import os
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from wxfs.database import File, Location, ManifestEntry
+
+
+# Number of manifest entries written per statement.
+batch_size = 1000
+
+
+def file_stat(entry):
+    """Return (size, modification time) of a file, given an `os.DirEntry`."""
+    stat = entry.stat()
+    return stat.st_size, stat.st_mtime
+
+
+def content_hash(filepath, chunk_size=1024 * 1024):
+    """Return the SHA-256 hash (hex) of the content of file `filepath`."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(sesh, root):
+    """Return the manifest entries for files under directory `root`, as a dict
+    mapping filepath to (size, modification time, hash)."""
+    prefix = os.path.join(root, "")
+    query = sesh.query(
+        ManifestEntry.filepath,
+        ManifestEntry.size,
+        ManifestEntry.mtime,
+        ManifestEntry.hash,
+    ).filter(ManifestEntry.filepath.startswith(prefix, autoescape=True))
+    return {filepath: (size, mtime, hash) for filepath, size, mtime, hash in query}
+
+
+def compare(manifest, stats, hashes=False):
+    """Compare files as found with the manifest.
+
+    :param manifest: Manifest entries (see `load_manifest`).
+    :param stats: Dict mapping filepath to (size, modification time) of the
+        files found.
+    :param hashes: If true, a file whose size or modification time differs from
+        its entry, but whose recorded hash matches, is unchanged.
+    :return: tuple (added, changed, removed, touched); sets of filepaths.
+        Touched files are unchanged, but their entries are out of date.
+    """
+    added, changed, touched = set(), set(), set()
+    for filepath, stat in stats.items():
+        entry = manifest.get(filepath)
+        if entry is None:
+            added.add(filepath)
+        elif stat != entry[:2]:
+            if hashes and entry[2] is not None and content_hash(filepath) == entry[2]:
+                touched.add(filepath)
+            else:
+                changed.add(filepath)
+    removed = set(manifest) - set(stats)
+    return added, changed, removed, touched
+
+
+def record(sesh, stats, hashes=False):
+    """Record files in the manifest, replacing any existing entries.
+
+    :param stats: Dict mapping filepath to (size, modification time).
+    :param hashes: If true, also record content hashes.
+    """
+    entries = [
+        {
+            "filepath": filepath,
+            "size": size,
+            "mtime": mtime,
+            "hash": content_hash(filepath) if hashes else None,
+        }
+        for filepath, (size, mtime) in stats.items()
+    ]
+    for start in range(0, len(entries), batch_size):
+        statement = insert(ManifestEntry).values(entries[start : start + batch_size])
+        sesh.execute(
+            statement.on_conflict_do_update(
+                index_elements=[ManifestEntry.filepath],
+                set_={
+                    "size": statement.excluded.size,
+                    "mtime": statement.excluded.mtime,
+                    "hash": statement.excluded.hash,
+                },
+            )
+        )
+
+
+def remove(sesh, filepaths):
+    """Remove files from the catalog and the manifest, along with any locations
+    left without files."""
+    filepaths = list(filepaths)
+    for start in range(0, len(filepaths), batch_size):
+        batch = filepaths[start : start + batch_size]
+        location_ids = {
+            location_id
+            for location_id, in sesh.query(File.location_id).filter(
+                File.filepath.in_(batch)
+            )
+        }
+        # Rows of subtype tables are deleted by cascade.
+        sesh.query(File).filter(File.filepath.in_(batch)).delete(
+            synchronize_session=False
+        )
+        remaining = select(File.location_id).where(File.location_id.in_(location_ids))
+        sesh.query(Location).filter(
+            Location.id.in_(location_ids), Location.id.not_in(remaining)
+        ).delete(synchronize_session=False)
+        sesh.query(ManifestEntry).filter(ManifestEntry.filepath.in_(batch)).delete(
+            synchronize_session=False
+        )
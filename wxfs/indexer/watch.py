@@ -0,0 +1,282 @@
+"""Watching a collection of location directories and indexing changes to it.
+
+A watcher reports which location directories of a collection have changed.
+`InotifyWatcher` is told of changes by the kernel (Linux inotify), as they
+happen; it needs optional dependency `inotify_simple`. Inotify does not see
+changes made on other hosts to network filesystems such as NFS, so
+`PollingWatcher`, which rescans the collection at intervals, is the fallback.
+
+`watch` waits for changes to settle in each changed location directory, since
+files tend to arrive in bursts, then indexes the directory with
+`index_location_changes` in a transaction of its own. Committing bumps the
+catalog generation, so running services refresh their caches.
+"""
+
+import logging
+import os
+import time
+
+from wxfs.indexer import commit, parse_location, scan_location, write_location
+from wxfs.indexer import manifest
+
+try:
+    import inotify_simple
+except ImportError:  # pragma: no cover
+    inotify_simple = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def location_directories(root):
+    """Return the paths of the location directories in collection `root`."""
+    return [entry.path for entry in os.scandir(root) if entry.is_dir()]
+
+
+def scan_directory(directory):
+    """Return the sizes and modification times of the files in location
+    directory `directory`, or None if it does not exist."""
+    try:
+        *_, stats = scan_location(directory)
+    except FileNotFoundError:
+        return None
+    return stats
+
+
+class PollingWatcher:
+    """Detects changes to location directories by rescanning the collection
+    every `interval` seconds and comparing file sizes and modification times.
+
+    Rescanning a large collection on network storage is slow, so in between,
+    only the directories `watch` is waiting on to settle are rescanned.
+
+    :param root: Collection directory.
+    :param interval: Time (seconds) between scans of the whole collection.
+    """
+
+    def __init__(self, root, interval=60.0):
+        self.root = root
+        self.interval = interval
+        self.snapshot = self.scan()
+        self.next_scan = time.monotonic() + interval
+
+    def scan(self):
+        """Return the sizes and modification times of the files in each
+        location directory, by location directory."""
+        snapshot = {}
+        for directory in location_directories(self.root):
+            stats = scan_directory(directory)
+            # None if removed since it was listed.
+            if stats is not None:
+                snapshot[directory] = stats
+        return snapshot
+
+    def wait(self, timeout=None, pending=()):
+        """Wait for the next scan of the collection, but no longer than
+        `timeout` seconds, and return the set of location directories changed
+        since they were last scanned. If the timeout comes first, only the
+        `pending` location directories are rescanned.
+        """
+        now = time.monotonic()
+        full = timeout is None or now + timeout >= self.next_scan
+        time.sleep(max(0.0, self.next_scan - now) if full else timeout)
+        if full:
+            snapshot = self.scan()
+            self.next_scan = time.monotonic() + self.interval
+        else:
+            snapshot = dict(self.snapshot)
+            for directory in pending:
+                stats = scan_directory(directory)
+                if stats is None:
+                    snapshot.pop(directory, None)
+                else:
+                    snapshot[directory] = stats
+        changed = {
+            directory
+            for directory in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(directory) != self.snapshot.get(directory)
+        }
+        self.snapshot = snapshot
+        return changed
+
+
+class InotifyWatcher:
+    """Detects changes to location directories with inotify.
+
+    The collection directory is watched for location directories being added
+    and removed, and each location directory for files being written, moved
+    and removed.
+
+    :param root: Collection directory.
+    """
+
+    root_flags = (
+        0
+        if inotify_simple is None
+        else (
+            inotify_simple.flags.CREATE
+            | inotify_simple.flags.DELETE
+            | inotify_simple.flags.MOVED_TO
+            | inotify_simple.flags.MOVED_FROM
+            | inotify_simple.flags.ONLYDIR
+        )
+    )
+    location_flags = (
+        0
+        if inotify_simple is None
+        else (
+            inotify_simple.flags.CLOSE_WRITE
+            | inotify_simple.flags.DELETE
+            | inotify_simple.flags.MOVED_TO
+            | inotify_simple.flags.MOVED_FROM
+        )
+    )
+
+    def __init__(self, root):
+        if inotify_simple is None:
+            raise RuntimeError("inotify is not available (install inotify_simple)")
+        self.root = root
+        self.inotify = inotify_simple.INotify()
+        self.root_wd = self.inotify.add_watch(root, self.root_flags)
+        # Location directory by watch descriptor.
+        self.directories = {}
+        for directory in location_directories(root):
+            self.add_location(directory)
+
+    def add_location(self, directory):
+        try:
+            wd = self.inotify.add_watch(directory, self.location_flags)
+        except FileNotFoundError:
+            return
+        self.directories[wd] = directory
+
+    def wait(self, timeout=None, pending=()):
+        """Wait for changes, but no longer than `timeout` seconds, and return
+        the set of location directories changed. Inotify reports every change,
+        so `pending` (see `PollingWatcher.wait`) is not needed."""
+        events = self.inotify.read(timeout=None if timeout is None else timeout * 1000)
+        changed = set()
+        for event in events:
+            if event.mask & inotify_simple.flags.IGNORED:
+                # Watch removed, along with its directory.
+                self.directories.pop(event.wd, None)
+            elif event.wd == self.root_wd:
+                if event.mask & inotify_simple.flags.ISDIR:
+                    directory = os.path.join(self.root, event.name)
+                    if event.mask & (
+                        inotify_simple.flags.CREATE | inotify_simple.flags.MOVED_TO
+                    ):
+                        # Files may have been added before the watch was.
+                        self.add_location(directory)
+                    changed.add(directory)
+            elif event.wd in self.directories:
+                changed.add(self.directories[event.wd])
+        return changed
+
+    def close(self):
+        self.inotify.close()
+
+
+def make_watcher(root, poll=False, interval=60.0):
+    """Return an `InotifyWatcher` for collection `root` if inotify is
+    available and `poll` is false, otherwise a `PollingWatcher`."""
+    if not poll and inotify_simple is not None:
+        try:
+            return InotifyWatcher(root)
+        except OSError as e:
+            logger.warning(f"inotify unavailable ({e}); polling instead")
+    return PollingWatcher(root, interval=interval)
+
+
+def index_location_changes(
+    sesh, version, directory, hashes=False, climate_stats=False, sidecar_directory=None
+):
+    """Index the changes to location directory `directory` since it was last
+    indexed, according to the manifest (see `wxfs.indexer.manifest`).
+
+    Removed and changed files are removed from the catalog; if any files were
+    added or changed, the location is indexed (see `parse_location` for
+    `climate_stats` and `sidecar_directory`). Changes are not committed.
+
+    :return: tuple (added, changed, removed); sets of filepaths.
+    """
+    try:
+        *_, stats = scan_location(directory)
+    except FileNotFoundError:
+        stats = {}
+    added, changed, removed, touched = manifest.compare(
+        manifest.load_manifest(sesh, directory), stats, hashes=hashes
+    )
+    manifest.remove(sesh, changed | removed)
+    manifest.record(sesh, {path: stats[path] for path in touched}, hashes)
+    if added or changed:
+        parsed_location = parse_location(
+            directory,
+            climate_stats=climate_stats,
+            sidecar_directory=sidecar_directory,
+        )
+        write_location(sesh, version, parsed_location)
+        manifest.record(sesh, parsed_location[3], hashes)
+    return added, changed, removed
+
+
+def watch(
+    Session,
+    version,
+    watcher,
+    debounce=5.0,
+    hashes=False,
+    climate_stats=False,
+    sidecar_directory=None,
+):
+    """Index changes to a collection as they are reported by `watcher`, until
+    interrupted.
+
+    A changed location directory is indexed once it has had no further changes
+    for `debounce` seconds, in a transaction of its own. The watcher is told
+    which directories are pending, so that a `PollingWatcher` can check them
+    without rescanning the whole collection. An error indexing a
+    directory is logged, and the directory is retried at its next change.
+
+    :param Session: SQLAlchemy session factory for a Wx Files database.
+    :param watcher: `InotifyWatcher` or `PollingWatcher`.
+    """
+    # Time of last change, by changed directory waiting to be indexed.
+    pending = {}
+    while True:
+        now = time.monotonic()
+        timeout = (
+            max(0.0, min(pending.values()) + debounce - now) if pending else None
+        )
+        reported = watcher.wait(timeout, set(pending))
+        now = time.monotonic()
+        for directory in reported:
+            pending[directory] = now
+
+        for directory in sorted(pending):
+            if now - pending[directory] < debounce:
+                continue
+            del pending[directory]
+            sesh = Session()
+            try:
+                added, changed, removed = index_location_changes(
+                    sesh,
+                    version,
+                    directory,
+                    hashes=hashes,
+                    climate_stats=climate_stats,
+                    sidecar_directory=sidecar_directory,
+                )
+                if added or changed or removed:
+                    commit(sesh)
+                    logger.info(
+                        f"Indexed {directory}: {len(added)} added, "
+                        f"{len(changed)} changed, {len(removed)} removed files"
+                    )
+                else:
+                    sesh.commit()
+            except Exception:
+                logger.exception(f"Error indexing {directory}")
+                sesh.rollback()
+            finally:
+                sesh.close()
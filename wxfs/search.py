@@ -0,0 +1,99 @@
+"""Text index for typeahead search.
+
+Text is normalized for matching: accents are removed, case is folded, and
+anything other than letters and digits separates words. Each word is then
+broken into trigrams (overlapping 3-character substrings) after padding its
+start with two spaces, so that the leading trigrams ("  v", " va") encode word
+prefixes. A query is normalized and broken into trigrams the same way, except
+that the end of its last word is left open, since the user is still typing it.
+Candidates are the entries sharing query trigrams, found through an inverted
+index (trigram -> entries), so a query never scans the whole collection.
+
+Candidates are ranked by the fraction of query trigrams they contain, then by
+whether their primary text starts with the query, then by whether any word
+starts with it, then by shortness. The trigram match tolerates typos and finds
+substrings; the prefix criteria make the obvious completions come first.
+"""
+
+import heapq
+import re
+import unicodedata
+
+
+def normalize(text):
+    """Return `text` with accents removed, case folded, and runs of characters
+    other than letters and digits replaced by single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return re.sub(r"[\W_]+", " ", stripped.casefold()).strip()
+
+
+def trigrams(text, open_end=False):
+    """Return the set of trigrams of normalized `text`.
+
+    :param open_end: If true, the last word is treated as a prefix: no trigram
+        spans its end.
+    """
+    words = text.split()
+    result = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if open_end and i == len(words) - 1 else f"  {word} "
+        result.update(padded[j : j + 3] for j in range(len(padded) - 2))
+    return result
+
+
+class TextIndex:
+    """Trigram index over items described by text.
+
+    :param entries: Iterable of (item, primary text, other texts) tuples.
+        Primary text (e.g., a name) is favoured in ranking; other texts (e.g.,
+        codes) are only matched.
+    :param min_similarity: A result must contain more than this fraction of
+        the query trigrams.
+    """
+
+    def __init__(self, entries, min_similarity=0.5):
+        self.min_similarity = min_similarity
+        self.items = []
+        self.primary = []
+        self.words = []
+        self.postings = {}
+        for item, primary, others in entries:
+            index = len(self.items)
+            primary = normalize(primary)
+            text = " ".join([primary, *(normalize(other) for other in others)])
+            self.items.append(item)
+            self.primary.append(primary)
+            self.words.append(text.split())
+            for trigram in trigrams(text):
+                self.postings.setdefault(trigram, []).append(index)
+
+    def __len__(self):
+        return len(self.items)
+
+    def search(self, query, limit=20):
+        """Return up to `limit` items matching `query`, best first."""
+        query = normalize(query)
+        query_trigrams = trigrams(query, open_end=True)
+        if not query_trigrams:
+            return []
+
+        counts = {}
+        for trigram in query_trigrams:
+            for index in self.postings.get(trigram, ()):
+                counts[index] = counts.get(index, 0) + 1
+
+        threshold = self.min_similarity * len(query_trigrams)
+        last_word = query.split()[-1]
+
+        def rank(index):
+            return (
+                -counts[index],
+                not self.primary[index].startswith(query),
+                not any(word.startswith(last_word) for word in self.words[index]),
+                len(self.primary[index]),
+                self.primary[index],
+            )
+
+        candidates = (index for index, count in counts.items() if count > threshold)
+        return [self.items[index] for index in heapq.nsmallest(limit, candidates, rank)]
@@ -0,0 +1,261 @@
+"""Spatial indexes over locations.
+
+`SpatialIndex` answers nearest-neighbour queries on the sphere. `ClusterGrid`
+selects points within a bounding box and clusters them for display on a map.
+
+Nearest neighbours
+------------------
+
+Points given by latitude and longitude are mapped to unit vectors in 3D. The
+straight-line (chord) distance between two unit vectors increases monotonically
+with the great-circle distance between the points, so the nearest points by
+chord distance are the nearest points on the Earth's surface. This lets us use
+an ordinary KD-tree over the vectors, with no special cases at the poles or the
+antimeridian. Queries take O(log n) time on average.
+"""
+
+import heapq
+import math
+
+
+earth_radius_km = 6371.0088
+
+
+def unit_vector(latitude, longitude):
+    """Return the unit vector (x, y, z) for a point given in degrees."""
+    phi = math.radians(latitude)
+    lam = math.radians(longitude)
+    return (
+        math.cos(phi) * math.cos(lam),
+        math.cos(phi) * math.sin(lam),
+        math.sin(phi),
+    )
+
+
+def chord_to_km(chord):
+    """Convert a chord distance between unit vectors to great-circle distance
+    (km)."""
+    return 2 * earth_radius_km * math.asin(min(1.0, chord / 2))
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    """Return the great-circle distance (km) between two points given in
+    degrees."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    dphi = phi2 - phi1
+    dlam = math.radians(longitude2 - longitude1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(
+        dlam / 2
+    ) ** 2
+    return 2 * earth_radius_km * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    """KD-tree over points on the sphere.
+
+    :param points: Iterable of (latitude, longitude, item) tuples. Items are
+        returned by queries; typically they are ids.
+    """
+
+    def __init__(self, points):
+        entries = [
+            (unit_vector(latitude, longitude), item)
+            for latitude, longitude, item in points
+        ]
+        self.size = len(entries)
+        self.root = self._build(entries, 0)
+
+    def __len__(self):
+        return self.size
+
+    @classmethod
+    def _build(cls, entries, depth):
+        """Build a (sub)tree. A node is a tuple
+        (vector, item, axis, left subtree, right subtree)."""
+        if not entries:
+            return None
+        axis = depth % 3
+        entries.sort(key=lambda entry: entry[0][axis])
+        median = len(entries) // 2
+        vector, item = entries[median]
+        return (
+            vector,
+            item,
+            axis,
+            cls._build(entries[:median], depth + 1),
+            cls._build(entries[median + 1 :], depth + 1),
+        )
+
+    def nearest(self, latitude, longitude, k=1):
+        """Return the `k` items nearest a point, nearest first.
+
+        :return: list of (distance in km, item) tuples.
+        """
+        if k < 1:
+            return []
+        target = unit_vector(latitude, longitude)
+        # Max-heap (by negated squared distance) of the best k found so far.
+        # The counter breaks ties without comparing items.
+        best = []
+        counter = 0
+        # Subtrees to visit, with the squared distance from the target to the
+        # splitting plane that separates them from it.
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, plane_d2 = stack.pop()
+            if node is None or (len(best) == k and plane_d2 >= -best[0][0]):
+                continue
+            vector, item, axis, left, right = node
+            d2 = sum((a - b) ** 2 for a, b in zip(vector, target))
+            counter += 1
+            if len(best) < k:
+                heapq.heappush(best, (-d2, counter, item))
+            elif d2 < -best[0][0]:
+                heapq.heapreplace(best, (-d2, counter, item))
+
+            diff = target[axis] - vector[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Push the far side first so that the near side is visited first;
+            # that tightens the bound before the far side is considered.
+            stack.append((far, diff * diff))
+            stack.append((near, 0.0))
+
+        return [
+            (chord_to_km(math.sqrt(-neg_d2)), item)
+            for neg_d2, _, item in sorted(best, reverse=True)
+        ]
+
+
+def cell_index(latitude, longitude, cell_size):
+    """Return the index (column, row) of the grid cell containing a point."""
+    return (
+        math.floor((longitude + 180) / cell_size),
+        math.floor((latitude + 90) / cell_size),
+    )
+
+
+class ClusterGrid:
+    """Grid index over points, for selecting the points within a bounding box
+    and clustering them for display on a map at a given zoom level.
+
+    Zoom levels follow the usual web map convention: at zoom level z, the world
+    is 256 * 2**z pixels wide. Below `max_cluster_zoom`, points are clustered in
+    grid cells about `cell_pixels` wide on screen. The clusters for each such
+    zoom level are computed up front, so the cost of a query depends only on
+    the number of cells in view, which is bounded by the size of the map, not
+    on the number of points. From `max_cluster_zoom` on, individual points
+    are returned, looked up in a grid at the finest cell size.
+
+    :param points: Iterable of (latitude, longitude, properties) tuples.
+    :param max_cluster_zoom: Zoom level from which points are not clustered.
+    :param cell_pixels: Approximate on-screen size of a cluster cell.
+    """
+
+    def __init__(self, points, max_cluster_zoom=10, cell_pixels=64):
+        self.max_cluster_zoom = max_cluster_zoom
+        self.cell_pixels = cell_pixels
+        points = list(points)
+
+        # Individual points, by cell at the finest level.
+        self.point_cells = {}
+        size = self.cell_size(max_cluster_zoom)
+        for point in points:
+            latitude, longitude, _ = point
+            cell = cell_index(latitude, longitude, size)
+            self.point_cells.setdefault(cell, []).append(point)
+
+        # Clusters, as [count, latitude sum, longitude sum, a member] by cell,
+        # for each zoom level at which points are clustered.
+        self.cluster_cells = []
+        for zoom in range(max_cluster_zoom):
+            size = self.cell_size(zoom)
+            cells = {}
+            for point in points:
+                latitude, longitude, _ = point
+                cluster = cells.setdefault(
+                    cell_index(latitude, longitude, size), [0, 0.0, 0.0, point]
+                )
+                cluster[0] += 1
+                cluster[1] += latitude
+                cluster[2] += longitude
+            self.cluster_cells.append(cells)
+
+    def cell_size(self, zoom):
+        """Return the size (degrees) of a cluster cell at `zoom`."""
+        return 360.0 / 2**zoom * self.cell_pixels / 256
+
+    @staticmethod
+    def _in_cells(cells, cell_size, west, south, east, north):
+        """Generate the (index, value) of the cells intersecting a bounding
+        box."""
+        x0, y0 = cell_index(south, west, cell_size)
+        x1, y1 = cell_index(north, east, cell_size)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(cells):
+            # Sparse grid, big box: cheaper to scan the occupied cells.
+            for (x, y), value in cells.items():
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    yield (x, y), value
+        else:
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    value = cells.get((x, y))
+                    if value is not None:
+                        yield (x, y), value
+
+    def features(self, bbox=None, zoom=None):
+        """Return GeoJSON features for the points within a bounding box,
+        clustered for `zoom`.
+
+        :param bbox: (west, south, east, north) in degrees. If west > east, the
+            box crosses the antimeridian. None for the whole world.
+        :param zoom: Map zoom level; None for no clustering.
+        :return: list of GeoJSON Feature objects. A point is a feature with its
+            properties; a cluster is a feature at the centroid of its points
+            with properties `cluster` (true) and `point_count`.
+        """
+        west, south, east, north = bbox or (-180, -90, 180, 90)
+        if west > east:
+            boxes = [(west, south, 180, north), (-180, south, east, north)]
+        else:
+            boxes = [(west, south, east, north)]
+
+        features = []
+        if zoom is None or zoom >= self.max_cluster_zoom:
+            size = self.cell_size(self.max_cluster_zoom)
+            for box in boxes:
+                w, s, e, n = box
+                for _, points in self._in_cells(self.point_cells, size, *box):
+                    for latitude, longitude, properties in points:
+                        if w <= longitude <= e and s <= latitude <= n:
+                            features.append(
+                                point_feature(latitude, longitude, properties)
+                            )
+            return features
+
+        # A cell can intersect both halves of a box crossing the antimeridian,
+        # but its cluster is one feature.
+        size = self.cell_size(zoom)
+        clusters = {}
+        for box in boxes:
+            clusters.update(self._in_cells(self.cluster_cells[zoom], size, *box))
+        for count, lat_sum, lon_sum, member in clusters.values():
+            if count == 1:
+                features.append(point_feature(*member))
+            else:
+                features.append(
+                    point_feature(
+                        lat_sum / count,
+                        lon_sum / count,
+                        {"cluster": True, "point_count": count},
+                    )
+                )
+        return features
+
+
+def point_feature(latitude, longitude, properties):
+    """Return a GeoJSON Point feature."""
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [longitude, latitude]},
+        "properties": properties,
+    }